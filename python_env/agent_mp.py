@@ -15,19 +15,24 @@ The supervisor manages the lifecycle of all child processes and
 coordinates the pipeline deployment phases.
 """
 
+import gc
 import os
 import sys
 import time
+import asyncio
 import signal
 import logging
+import threading
+import multiprocessing as mp
 from pathlib import Path
 from typing import Dict, Any, Optional
-from multiprocessing import Manager, Event
+from multiprocessing import Event, Process
 
 # Add modules directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from modules.config_manager import ConfigManager
+from modules.shared_state import SharedState
 from modules.resource_controller import ResourceController
 from modules.connectivity_async import ConnectivityChecker
 from modules.metrics_server import MetricsServer
@@ -45,8 +50,41 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# The format above uses neither the process id nor the process name, so
+# skip looking them up for every record
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
 logger = logging.getLogger(__name__)
 
+# Refresh Docker stack status every N monitor iterations
+STACK_STATUS_INTERVAL = 5
+
+
+def _alive(process: Optional[Process]) -> bool:
+    """
+    Fast liveness probe for a child process
+    
+    Unlike Process.is_alive(), this takes no lock and does not reap the
+    child. os.kill(pid, 0) alone would report an unreaped (zombie) child
+    as alive, so waitid() with WNOWAIT is preferred where available.
+    
+    Args:
+        process: Child process to probe
+        
+    Returns:
+        True if the process is still running
+    """
+    try:
+        if hasattr(os, 'waitid'):
+            return os.waitid(
+                os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT
+            ) is None
+        os.kill(process.pid, 0)
+        return True
+    except (OSError, TypeError, AttributeError):
+        return False
+
 
 class IDS2Agent:
     """
@@ -75,16 +113,22 @@ class IDS2Agent:
             logger.error(f"Failed to load configuration: {e}")
             sys.exit(1)
         
-        # Create shared state using multiprocessing.Manager()
-        self.manager = Manager()
-        self.shared_state = self.manager.dict()
+        # Create shared state in a shared memory segment
+        self.shared_state = SharedState()
         
         # Initialize shared state
         self._init_shared_state()
         
+        # Set by the connectivity checker once AWS is reachable
+        self.aws_ready_event = Event()
+        
         # Initialize managers
         self.resource_controller = ResourceController(self.config, self.shared_state)
-        self.connectivity_checker = ConnectivityChecker(self.config, self.shared_state)
+        self.connectivity_checker = ConnectivityChecker(
+            self.config,
+            self.shared_state,
+            self.aws_ready_event
+        )
         self.metrics_server = MetricsServer(self.config, self.shared_state)
         self.aws_manager = AWSManager(self.config)
         self.docker_manager = DockerManager(self.config)
@@ -98,45 +142,81 @@ class IDS2Agent:
             self.suricata_manager # Passer SuricataManager
         ) # Initialisation de l'API Flask
         
+        # Child processes, in start order
+        self._children = [
+            ("Resource Controller (Process #2)", self.resource_controller),
+            ("Connectivity Checker (Process #3)", self.connectivity_checker),
+            ("Metrics Server (Process #4)", self.metrics_server),
+            ("API Server (Process #5)", self.api_server),
+        ]
+        
         # Shutdown event
         self.shutdown_event = Event()
         
-        # Register signal handlers
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # Signal handlers are registered in run() once the children are
+        # forked; this pid tells a (restarted) child it inherited them
+        self._supervisor_pid = os.getpid()
         
         logger.info("IDS2 Agent initialized")
     
     def _init_shared_state(self) -> None:
-        """Initialize shared state dictionary"""
-        # Resource metrics
-        self.shared_state['cpu_percent'] = 0.0
-        self.shared_state['ram_percent'] = 0.0
-        self.shared_state['throttle_level'] = 0
-        self.shared_state['resource_ok'] = True
-        
-        # Connectivity status
-        self.shared_state['dns_ok'] = False
-        self.shared_state['tls_ok'] = False
-        self.shared_state['opensearch_ok'] = False
-        self.shared_state['aws_ready'] = False
-        self.shared_state['opensearch_endpoint'] = self.config.get('aws.opensearch_endpoint')
-        
-        # Service status
-        self.shared_state['vector_running'] = False
-        self.shared_state['suricata_running'] = False
-        self.shared_state['redis_running'] = False
-        self.shared_state['api_server_running'] = False # Nouvel état pour l'API Flask
-        self.shared_state['pipeline_ok'] = False
-        
-        # Counters
-        self.shared_state['events_processed'] = 0
-        self.shared_state['events_failed'] = 0
+        """Initialize shared state fields"""
+        self.shared_state.update({
+            # Resource metrics
+            'cpu_percent': 0.0,
+            'ram_percent': 0.0,
+            'throttle_level': 0,
+            'resource_ok': True,
+            
+            # Connectivity status
+            'dns_ok': False,
+            'tls_ok': False,
+            'opensearch_ok': False,
+            'aws_ready': False,
+            'opensearch_endpoint': self.config.get('aws.opensearch_endpoint'),
+            
+            # Service status
+            'vector_running': False,
+            'suricata_running': False,
+            'redis_running': False,
+            'api_server_running': False, # Nouvel état pour l'API Flask
+            'pipeline_ok': False,
+            
+            # Counters
+            'events_processed': 0,
+            'events_failed': 0,
+        })
         
         logger.debug("Shared state initialized")
     
+    def _update_stack_status(self) -> Dict[str, bool]:
+        """
+        Publish Docker service status to shared state in one write
+        
+        Returns:
+            Dictionary mapping service names to running status
+        """
+        stack_status = self.docker_manager.get_stack_status()
+        self.shared_state.update({
+            'vector_running': stack_status.get('vector', False),
+            'redis_running': stack_status.get('redis', False),
+        })
+        return stack_status
+    
+    def _release_shared_state(self) -> None:
+        """Detach from and destroy the shared state segment"""
+        self.shared_state.close()
+        self.shared_state.unlink()
+        logger.debug("Shared state released")
+    
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
+        if os.getpid() != self._supervisor_pid:
+            # Forked child: fall back to the default action (terminate)
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            return
+        
         logger.info(f"Received signal {signum}, initiating shutdown...")
         self.shutdown_event.set()
     
@@ -150,41 +230,24 @@ class IDS2Agent:
         logger.info("Starting child processes...")
         
         try:
-            # Start Process #2: Resource Controller
-            logger.info("Starting Resource Controller (Process #2)...")
-            self.resource_controller.start()
-            time.sleep(1)  # Give it time to start
-            
-            if not self.resource_controller.is_alive():
-                logger.error("Resource Controller failed to start")
-                return False
-            
-            # Start Process #3: Connectivity Checker
-            logger.info("Starting Connectivity Checker (Process #3)...")
-            self.connectivity_checker.start()
-            time.sleep(1)
+            # Move everything allocated during startup to the permanent
+            # generation: forked children inherit it, so their collections
+            # skip (and do not copy-on-write) the baseline heap
+            gc.freeze()
             
-            if not self.connectivity_checker.is_alive():
-                logger.error("Connectivity Checker failed to start")
-                return False
+            # Process.start() returns as soon as the child is forked, so
+            # launch everything first and wait on a single barrier.
+            for name, child in self._children:
+                logger.info(f"Starting {name}...")
+                child.start()
             
-            # Start Process #4: Metrics Server
-            logger.info("Starting Metrics Server (Process #4)...")
-            self.metrics_server.start()
-            time.sleep(1)
+            time.sleep(1)  # Give them time to start
             
-            if not self.metrics_server.is_alive():
-                logger.error("Metrics Server failed to start")
-                return False
+            for name, child in self._children:
+                if not _alive(child.process):
+                    logger.error(f"{name} failed to start")
+                    return False
             
-            # Start Process #5: API Server
-            logger.info("Starting API Server (Process #5)...")
-            self.api_server.start()
-            time.sleep(1)
-
-            if not self.api_server.is_alive():
-                logger.error("API Server failed to start")
-                return False
             self.shared_state['api_server_running'] = True
             
             logger.info("All child processes started successfully")
@@ -254,22 +317,22 @@ class IDS2Agent:
         logger.info("PHASE A: AWS Verification")
         logger.info("=" * 80)
         
-        # Verify AWS credentials
-        logger.info("Verifying AWS credentials...")
-        if not self.aws_manager.verify_credentials():
-            logger.error("AWS credentials verification failed")
-            return False
-        
         # Get domain configuration
         domain_name = self.config.get('aws.opensearch_domain')
         if not domain_name:
             logger.error("No OpenSearch domain configured")
             return False
         
-        # Verify domain exists
-        logger.info(f"Verifying OpenSearch domain: {domain_name}")
-        if not self.aws_manager.verify_domain_exists(domain_name):
-            logger.error(f"OpenSearch domain '{domain_name}' not found or not ready")
+        # Verify AWS credentials and domain (concurrently)
+        logger.info("Verifying AWS credentials and OpenSearch domain: %s", domain_name)
+        creds_ok, domain_ok = asyncio.run(self.aws_manager.preflight(domain_name))
+        
+        if not creds_ok:
+            logger.error("AWS credentials verification failed")
+            return False
+        
+        if not domain_ok:
+            logger.error("OpenSearch domain '%s' not found or not ready", domain_name)
             return False
         
         # Get domain endpoint
@@ -278,7 +341,7 @@ class IDS2Agent:
             logger.error("Could not get OpenSearch endpoint")
             return False
         
-        logger.info(f"OpenSearch endpoint: {endpoint}")
+        logger.info("OpenSearch endpoint: %s", endpoint)
 
         # Share endpoint for connectivity checks
         self.shared_state['opensearch_endpoint'] = endpoint
@@ -355,9 +418,7 @@ class IDS2Agent:
             return False
         
         # Update shared state
-        stack_status = self.docker_manager.get_stack_status()
-        self.shared_state['vector_running'] = stack_status.get('vector', False)
-        self.shared_state['redis_running'] = stack_status.get('redis', False)
+        self._update_stack_status()
         
         logger.info("Phase C completed successfully")
         return True
@@ -373,30 +434,46 @@ class IDS2Agent:
         logger.info("PHASE D: Connectivity Verification")
         logger.info("=" * 80)
         
-        # Wait for connectivity checker to complete first check
+        # Wait for connectivity checker to signal AWS readiness
         logger.info("Waiting for connectivity checks...")
         max_wait = 120
-        start_time = time.time()
         
-        while (time.time() - start_time) < max_wait:
-            if self.shared_state.get('aws_ready', False):
-                logger.info("AWS connectivity verified")
-                return True
+        status_logger = threading.Thread(
+            target=self._log_connectivity_status,
+            args=(max_wait,),
+            name="ConnectivityStatusLogger",
+            daemon=True
+        )
+        status_logger.start()
+        
+        if not self.aws_ready_event.wait(timeout=max_wait):
+            logger.error("Timeout waiting for AWS connectivity")
+            return False
+        
+        logger.info("AWS connectivity verified")
+        return True
+    
+    def _log_connectivity_status(self, max_wait: float) -> None:
+        """
+        Log connectivity status every 10s until AWS is ready
+        
+        Args:
+            max_wait: Maximum time to keep logging in seconds
+        """
+        deadline = time.monotonic() + max_wait
+        
+        while time.monotonic() < deadline:
+            if self.aws_ready_event.wait(timeout=min(10, max(0, deadline - time.monotonic()))):
+                return
             
-            # Log current status
             dns_ok = self.shared_state.get('dns_ok', False)
             tls_ok = self.shared_state.get('tls_ok', False)
             opensearch_ok = self.shared_state.get('opensearch_ok', False)
             
             logger.info(
-                f"Connectivity status - DNS: {dns_ok}, TLS: {tls_ok}, "
-                f"OpenSearch: {opensearch_ok}"
+                "Connectivity status - DNS: %s, TLS: %s, OpenSearch: %s",
+                dns_ok, tls_ok, opensearch_ok
             )
-            
-            time.sleep(10)
-        
-        logger.error("Timeout waiting for AWS connectivity")
-        return False
     
     def _phase_e_verify_pipeline(self) -> bool:
         """
@@ -473,25 +550,26 @@ class IDS2Agent:
         logger.info("Metrics available at: http://localhost:9100/metrics")
         logger.info("=" * 80)
         
+        iteration = 0
+        
         try:
             while not self.shutdown_event.is_set():
-                # Monitor child processes
-                if not self.resource_controller.is_alive():
-                    logger.error("Resource Controller died, restarting...")
-                    self.resource_controller.start()
-                
-                if not self.connectivity_checker.is_alive():
-                    logger.error("Connectivity Checker died, restarting...")
-                    self.connectivity_checker.start()
+                iteration += 1
                 
-                if not self.metrics_server.is_alive():
-                    logger.error("Metrics Server died, restarting...")
-                    self.metrics_server.start()
+                # Monitor child processes by pid (one waitid each); an
+                # exited helper subprocess is left to its own Popen
+                for name, child in self._children:
+                    if _alive(child.process):
+                        continue
+                    logger.error("%s died, restarting...", name)
+                    child.process.join(timeout=0)
+                    child.start()
+                    if child is self.api_server:
+                        self.shared_state['api_server_running'] = True
                 
-                if not self.api_server.is_alive():
-                    logger.error("API Server died, restarting...")
-                    self.api_server.start()
-                    self.shared_state['api_server_running'] = True
+                # Refresh Docker stack status (reuses the cached Docker client)
+                if iteration % STACK_STATUS_INTERVAL == 0:
+                    self._update_stack_status()
                 
                 # Log status periodically
                 cpu = self.shared_state.get('cpu_percent', 0)
@@ -501,8 +579,8 @@ class IDS2Agent:
                 api_running = self.shared_state.get('api_server_running', False)
                 
                 logger.info(
-                    f"Status - CPU: {cpu:.1f}%, RAM: {ram:.1f}%, "
-                    f"Throttle: {throttle}, AWS: {aws_ready}, API: {api_running}"
+                    "Status - CPU: %.1f%%, RAM: %.1f%%, Throttle: %s, AWS: %s, API: %s",
+                    cpu, ram, throttle, aws_ready, api_running
                 )
                 
                 # Sleep
@@ -530,6 +608,10 @@ class IDS2Agent:
                 logger.error("Failed to start child processes")
                 return 1
             
+            # Register signal handlers (after fork, so children keep defaults)
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
+            
             # Phase A: Verify AWS
             if not self._phase_a_verify_aws():
                 logger.error("Phase A failed")
@@ -577,6 +659,9 @@ class IDS2Agent:
             logger.error(f"Fatal error: {e}", exc_info=True)
             self._stop_child_processes()
             return 1
+        
+        finally:
+            self._release_shared_state()
 
 
 def main():
@@ -584,6 +669,11 @@ def main():
     # Check for config file argument
     config_path = sys.argv[1] if len(sys.argv) > 1 else "config.yaml"
     
+    # Fork children so they inherit the already-imported modules (Quart,
+    # boto3, docker) copy-on-write instead of re-importing them
+    if sys.platform.startswith('linux'):
+        mp.set_start_method('fork', force=True)
+    
     # Create and run agent
     agent = IDS2Agent(config_path)
     exit_code = agent.run()
@@ -12,6 +12,9 @@ __author__ = "IDS2 SOC Team"
 __all__ = [
     "config_manager",
     "env_utils",
+    "file_utils",
+    "process_utils",
+    "shared_state",
     "resource_controller",
     "connectivity_async",
     "metrics_server",
@@ -1,36 +1,46 @@
 """
 API Server Module (Process #5)
 
-Exposes a Flask API for managing the IDS2 SOC Pipeline.
-Provides endpoints for status, control, and configuration.
+Exposes a Quart (async Flask-compatible) API for managing the IDS2 SOC
+Pipeline. Provides endpoints for status, control, and configuration.
+Served by hypercorn on a single uvloop event loop.
 
 This runs as a separate process.
 """
 
 import os
+import sys
+import asyncio
 import logging
-from multiprocessing import Process, Manager
+from multiprocessing import Process
 from typing import Dict, Any
 
-from flask import Flask, jsonify, request, render_template
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+    logging.warning("uvloop not available, using default asyncio loop")
 
-logger = logging.getLogger(__name__)
-
-import os
-import logging
-from multiprocessing import Process, Manager
-from typing import Dict, Any
-
-from flask import Flask, jsonify, request, render_template
+import orjson
+from hypercorn.asyncio import serve
+from hypercorn.config import Config as HypercornConfig
+from quart import Quart, Response, jsonify, request
 
 # Import managers for service control
 from modules.docker_manager import DockerManager
 from modules.suricata_manager import SuricataManager
+from modules.process_utils import demote_priority, set_parent_death_signal
 
 logger = logging.getLogger(__name__)
 
+# Dashboard assets live next to the modules package (python_env/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
 class APIServer:
-    """Flask API server for IDS2 SOC Pipeline"""
+    """Quart API server for IDS2 SOC Pipeline"""
 
     def __init__(self, config_manager, shared_state: Dict[str, Any], docker_manager: DockerManager, suricata_manager: SuricataManager):
         """
@@ -38,7 +48,7 @@ class APIServer:
 
         Args:
             config_manager: Configuration manager instance
-            shared_state: Shared state dictionary from multiprocessing.Manager()
+            shared_state: Process-shared state (modules.shared_state.SharedState)
             docker_manager: DockerManager instance for controlling Docker services
             suricata_manager: SuricataManager instance for controlling Suricata
         """
@@ -46,7 +56,7 @@ class APIServer:
         self.shared_state = shared_state
         self.docker_manager = docker_manager
         self.suricata_manager = suricata_manager
-        self.app = Flask(__name__, template_folder='templates', static_folder='static')
+        self.app = Quart(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
         
         api_server_config = self.config.get_section('api_server')
         self.port = api_server_config.get('port', 5000)
@@ -54,76 +64,141 @@ class APIServer:
 
         self.process: Process = None
 
+        # Encoded /api/status body, reused until shared state changes
+        self._status_version = -1
+        self._status_body = b''
+
+        # Dashboard page is static HTML, so it is read once and served as-is
+        with open(os.path.join(TEMPLATE_DIR, 'index.html'), 'rb') as f:
+            self._index_html = f.read()
+
         self._setup_routes()
 
+    @staticmethod
+    async def _read_json_body():
+        """
+        Parse the request body with orjson
+        
+        Returns:
+            Tuple of (parsed body, error response or None)
+        """
+        try:
+            body = orjson.loads(await request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return None, (jsonify({"status": "error", "message": "Invalid JSON body"}), 400)
+
+        if not isinstance(body, dict):
+            return None, (jsonify({"status": "error", "message": "JSON body must be an object"}), 400)
+
+        return body, None
+
     def _setup_routes(self):
-        """Set up Flask API routes"""
+        """Set up API routes"""
+
+        # Services the control endpoints accept, checked before any manager call
+        allowed_services = frozenset({'suricata', *self.docker_manager.services})
 
         @self.app.route('/')
-        def index():
-            return render_template('index.html')
+        async def index():
+            return Response(self._index_html, mimetype='text/html')
 
+        # Shared state reads are plain memory accesses, so status is served
+        # inline; only the blocking manager calls are moved off the loop.
         @self.app.route('/api/status', methods=['GET'])
-        def get_status():
-            return jsonify(self.shared_state)
+        async def get_status():
+            version = self.shared_state.version
+            if version != self._status_version:
+                self._status_body = orjson.dumps(self.shared_state.snapshot())
+                self._status_version = version
+
+            response = Response(self._status_body, mimetype='application/json')
+            response.content_length = len(self._status_body)
+            return response
 
         @self.app.route('/api/control/start', methods=['POST'])
-        def start_service():
-            service_name = request.json.get('service')
+        async def start_service():
+            body, error = await self._read_json_body()
+            if error:
+                return error
+
+            service_name = body.get('service')
             if not service_name:
                 return jsonify({"status": "error", "message": "Service name not provided"}), 400
+            if not isinstance(service_name, str) or service_name not in allowed_services:
+                return jsonify({"status": "error", "message": f"Unknown service: {service_name}"}), 400
 
-            success = False
-            message = ""
             if service_name == "suricata":
-                success = self.suricata_manager.start() # Assuming a start method for Suricata
+                success = await asyncio.to_thread(self.suricata_manager.start) # Assuming a start method for Suricata
                 message = f"Attempting to start Suricata. Success: {success}"
-            elif service_name in self.docker_manager.services:
-                success = self.docker_manager.restart_service(service_name) # Restart for Docker services
-                message = f"Attempting to start/restart Docker service {service_name}. Success: {success}"
             else:
-                message = f"Unknown service: {service_name}"
-                return jsonify({"status": "error", "message": message}), 400
+                success = await asyncio.to_thread(self.docker_manager.restart_service, service_name) # Restart for Docker services
+                message = f"Attempting to start/restart Docker service {service_name}. Success: {success}"
             
-            logger.info(f"Request to start service: {service_name}. Result: {message}")
+            logger.info("Request to start service: %s. Result: %s", service_name, message)
             return jsonify({"status": "success" if success else "error", "message": message})
 
         @self.app.route('/api/control/stop', methods=['POST'])
-        def stop_service():
-            service_name = request.json.get('service')
+        async def stop_service():
+            body, error = await self._read_json_body()
+            if error:
+                return error
+
+            service_name = body.get('service')
             if not service_name:
                 return jsonify({"status": "error", "message": "Service name not provided"}), 400
+            if not isinstance(service_name, str) or service_name not in allowed_services:
+                return jsonify({"status": "error", "message": f"Unknown service: {service_name}"}), 400
 
-            success = False
-            message = ""
             if service_name == "suricata":
-                success = self.suricata_manager.stop() # Assuming a stop method for Suricata
+                success = await asyncio.to_thread(self.suricata_manager.stop) # Assuming a stop method for Suricata
                 message = f"Attempting to stop Suricata. Success: {success}"
-            elif service_name in self.docker_manager.services:
-                success = self.docker_manager.stop_service(service_name) # Stop for Docker services
-                message = f"Attempting to stop Docker service {service_name}. Success: {success}"
             else:
-                message = f"Unknown service: {service_name}"
-                return jsonify({"status": "error", "message": message}), 400
+                success = await asyncio.to_thread(self.docker_manager.stop_service, service_name) # Stop for Docker services
+                message = f"Attempting to stop Docker service {service_name}. Success: {success}"
             
-            logger.info(f"Request to stop service: {service_name}. Result: {message}")
+            logger.info("Request to stop service: %s. Result: %s", service_name, message)
             return jsonify({"status": "success" if success else "error", "message": message})
 
         @self.app.route('/api/config', methods=['GET'])
-        def get_config():
-            return jsonify(self.config.config)
+        async def get_config():
+            # ConfigManager.config is a plain per-process dict, not a proxy
+            return Response(orjson.dumps(self.config.config), mimetype='application/json')
 
         @self.app.route('/api/config/update', methods=['POST'])
-        def update_config():
-            new_config = request.json
+        async def update_config():
+            new_config, error = await self._read_json_body()
+            if error:
+                return error
+
             # Logic to update config.yaml (requires careful validation and reload)
-            logger.info(f"Request to update config: {new_config}")
+            logger.info("Request to update config: %s", new_config)
             return jsonify({"status": "success", "message": "Config update initiated"})
 
-    def _run_flask_app(self):
-        """Run the Flask application"""
-        logger.info(f"Flask API server starting on {self.host}:{self.port}")
-        self.app.run(host=self.host, port=self.port, debug=False)
+    def _run_app(self):
+        """
+        Entry point for Process #5
+        
+        Serves the Quart application with hypercorn on one event loop
+        (uvloop if available).
+        """
+        set_parent_death_signal()
+        demote_priority()
+        self.serve()
+
+    def serve(self) -> None:
+        """
+        Serve the Quart application with hypercorn on one event loop
+        (uvloop if available), blocking until it stops
+        """
+        hypercorn_config = HypercornConfig()
+        hypercorn_config.bind = [f"{self.host}:{self.port}"]
+        hypercorn_config.accesslog = None
+
+        logger.info(f"API server starting on {self.host}:{self.port}")
+        if UVLOOP_AVAILABLE:
+            uvloop.run(serve(self.app, hypercorn_config))
+        else:
+            asyncio.run(serve(self.app, hypercorn_config))
 
     def start(self) -> None:
         """Start API server process"""
@@ -132,7 +207,7 @@ class APIServer:
             return
 
         self.process = Process(
-            target=self._run_flask_app,
+            target=self._run_app,
             name="APIServer"
         )
         self.process.start()
@@ -163,3 +238,37 @@ class APIServer:
     def is_alive(self) -> bool:
         """Check if API server process is alive"""
         return self.process and self.process.is_alive()
+
+
+def main():
+    """
+    Standalone entry point (docker-compose api-server service)
+    
+    Usage: python3 -m modules.api_server [config.yaml]
+    """
+    from modules.config_manager import ConfigManager
+    from modules.shared_state import SharedState
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s'
+    )
+
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "config.yaml"
+    config = ConfigManager(config_path)
+    shared_state = SharedState()
+
+    try:
+        APIServer(
+            config,
+            shared_state,
+            DockerManager(config),
+            SuricataManager(config)
+        ).serve()
+    finally:
+        shared_state.close()
+        shared_state.unlink()
+
+
+if __name__ == "__main__":
+    main()
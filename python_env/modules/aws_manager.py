@@ -5,19 +5,77 @@ Handles AWS OpenSearch domain provisioning, verification, and bulk ingestion.
 Uses boto3 with profile 'moi33'.
 """
 
+import os
+import math
+import asyncio
 import time
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import boto3
-from botocore.exceptions import ClientError, BotoCoreError
+import orjson
+from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError, WaiterError
+from botocore.waiter import WaiterModel, create_waiter_with_client
+
+try:
+    from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth, helpers
+    from opensearchpy import NotFoundError
+    from opensearchpy import AsyncOpenSearch, AsyncHttpConnection, AWSV4SignerAsyncAuth
+    OPENSEARCHPY_AVAILABLE = True
+except ImportError:
+    OPENSEARCHPY_AVAILABLE = False
+    logging.warning("opensearch-py not available, bulk ingestion disabled")
 
 logger = logging.getLogger(__name__)
 
+# Custom waiter for DescribeDomain: ready once the domain is created, not
+# processing and has an endpoint; fails fast on deleted/missing domains.
+# Delay/MaxAttempts are overridden per call via WaiterConfig.
+DOMAIN_WAITER_MODEL = WaiterModel({
+    'version': 2,
+    'waiters': {
+        'DomainActive': {
+            'delay': 30,
+            'maxAttempts': 20,
+            'operation': 'DescribeDomain',
+            'acceptors': [
+                {
+                    'matcher': 'path',
+                    'argument': (
+                        'DomainStatus.Created == `true` && '
+                        'DomainStatus.Processing == `false` && '
+                        'DomainStatus.Endpoint != null'
+                    ),
+                    'expected': True,
+                    'state': 'success'
+                },
+                {
+                    'matcher': 'path',
+                    'argument': 'DomainStatus.Deleted',
+                    'expected': True,
+                    'state': 'failure'
+                },
+                {
+                    'matcher': 'error',
+                    'expected': 'ResourceNotFoundException',
+                    'state': 'failure'
+                },
+            ]
+        }
+    }
+})
+
 
 class AWSManager:
     """Manages AWS OpenSearch interactions"""
     
+    # How long a DescribeDomain result is reused (seconds)
+    DOMAIN_CACHE_TTL = 5.0
+    
+    # Index settings applied for the duration of a bulk load
+    INGEST_SETTINGS = {'refresh_interval': '60s', 'number_of_replicas': 0}
+    
     def __init__(self, config_manager):
         """
         Initialize AWS manager
@@ -42,18 +100,111 @@ class AWSManager:
             logger.error(f"Failed to create AWS session: {e}")
             raise
         
-        # OpenSearch client
-        self.opensearch_client = None
-        self._init_opensearch_client()
+        # Client config shared by all AWS clients: adaptive retry mode
+        # (exponential backoff with jitter + client-side rate limiting).
+        # AWS_RETRY_MODE / AWS_MAX_ATTEMPTS still override the defaults.
+        self.client_config = Config(
+            retries={
+                'mode': os.environ.get('AWS_RETRY_MODE', 'adaptive'),
+                'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', 10))
+            },
+            connect_timeout=5,
+            read_timeout=30
+        )
+        
+        # AWS API clients, created on first use (see properties below)
+        self._opensearch_client = None
+        self._sts_client = None
+        self._domain_waiter = None
+        
+        # DescribeDomain cache: domain name -> (monotonic timestamp, DomainStatus)
+        self._domain_cache: Dict[str, tuple] = {}
+        
+        # OpenSearch data-plane clients by endpoint, reused so their pooled
+        # HTTPS connections survive between calls
+        self._search_clients: Dict[str, Any] = {}
+        
+        # SigV4 signers shared by all data-plane clients, so credentials are
+        # resolved once rather than per client
+        self._signer = None
+        self._async_signer = None
     
-    def _init_opensearch_client(self) -> None:
-        """Initialize OpenSearch client"""
-        try:
-            self.opensearch_client = self.session.client('opensearch')
-            logger.info("OpenSearch client initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenSearch client: {e}")
-            raise
+    def __enter__(self) -> "AWSManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close pooled OpenSearch connections"""
+        for client in self._search_clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug(f"Error closing OpenSearch client: {e}")
+        self._search_clients.clear()
+    
+    @property
+    def opensearch_client(self):
+        """OpenSearch service (control plane) client, created on first use"""
+        if self._opensearch_client is None:
+            try:
+                self._opensearch_client = self.session.client('opensearch', config=self.client_config)
+                logger.info("OpenSearch client initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize OpenSearch client: {e}")
+                raise
+        return self._opensearch_client
+    
+    @property
+    def sts_client(self):
+        """STS client, created on first use"""
+        if self._sts_client is None:
+            self._sts_client = self.session.client('sts', config=self.client_config)
+        return self._sts_client
+    
+    @property
+    def domain_waiter(self):
+        """DomainActive waiter bound to the OpenSearch client"""
+        if self._domain_waiter is None:
+            self._domain_waiter = create_waiter_with_client(
+                'DomainActive', DOMAIN_WAITER_MODEL, self.opensearch_client
+            )
+        return self._domain_waiter
+    
+    def _describe_domain(self, domain_name: str) -> Dict[str, Any]:
+        """
+        Get DomainStatus, reusing a recent DescribeDomain result
+        
+        Args:
+            domain_name: Name of the OpenSearch domain
+            
+        Returns:
+            DomainStatus dictionary
+            
+        Raises:
+            ClientError: If the DescribeDomain call fails
+        """
+        cached = self._domain_cache.get(domain_name)
+        if cached and time.monotonic() - cached[0] < self.DOMAIN_CACHE_TTL:
+            return cached[1]
+        
+        response = self.opensearch_client.describe_domain(DomainName=domain_name)
+        domain_status = response['DomainStatus']
+        self._domain_cache[domain_name] = (time.monotonic(), domain_status)
+        return domain_status
+    
+    def invalidate_domain_cache(self, domain_name: Optional[str] = None) -> None:
+        """
+        Drop cached DescribeDomain results
+        
+        Args:
+            domain_name: Domain to invalidate (None for all)
+        """
+        if domain_name is None:
+            self._domain_cache.clear()
+        else:
+            self._domain_cache.pop(domain_name, None)
     
     def verify_domain_exists(self, domain_name: str) -> bool:
         """
@@ -66,11 +217,7 @@ class AWSManager:
             True if domain exists and is active
         """
         try:
-            response = self.opensearch_client.describe_domain(
-                DomainName=domain_name
-            )
-            
-            domain_status = response['DomainStatus']
+            domain_status = self._describe_domain(domain_name)
             processing = domain_status.get('Processing', False)
             created = domain_status.get('Created', False)
             deleted = domain_status.get('Deleted', False)
@@ -117,11 +264,7 @@ class AWSManager:
             Domain endpoint URL or None if not available
         """
         try:
-            response = self.opensearch_client.describe_domain(
-                DomainName=domain_name
-            )
-            
-            endpoint = response['DomainStatus'].get('Endpoint')
+            endpoint = self._describe_domain(domain_name).get('Endpoint')
             if endpoint:
                 # Return full HTTPS URL
                 return f"https://{endpoint}"
@@ -151,18 +294,27 @@ class AWSManager:
         """
         logger.info(f"Waiting for domain {domain_name} to be ready (max {max_wait}s)...")
         
-        start_time = time.time()
-        
-        while (time.time() - start_time) < max_wait:
-            if self.verify_domain_exists(domain_name):
-                logger.info(f"Domain {domain_name} is ready")
-                return True
+        try:
+            self.domain_waiter.wait(
+                DomainName=domain_name,
+                WaiterConfig={
+                    'Delay': check_interval,
+                    'MaxAttempts': max(1, math.ceil(max_wait / check_interval))
+                }
+            )
+            logger.info(f"Domain {domain_name} is ready")
+            return True
             
-            logger.info(f"Domain not ready yet, waiting {check_interval}s...")
-            time.sleep(check_interval)
+        except WaiterError as e:
+            if 'Max attempts exceeded' in str(e):
+                logger.error(f"Timeout waiting for domain {domain_name}")
+            else:
+                logger.error(f"Domain {domain_name} will not become ready: {e}")
+            return False
         
-        logger.error(f"Timeout waiting for domain {domain_name}")
-        return False
+        finally:
+            # The domain state changed while waiting; don't serve stale status
+            self.invalidate_domain_cache(domain_name)
     
     def create_index_template(
         self,
@@ -181,11 +333,186 @@ class AWSManager:
         Returns:
             True if successful
         """
-        # This would use requests or aiohttp to create the template
-        # For now, this is a placeholder
-        logger.info(f"Index template creation would be implemented here")
-        logger.info(f"Template: {template_name}, Pattern: {index_pattern}")
-        return True
+        if not OPENSEARCHPY_AVAILABLE:
+            logger.error("opensearch-py not available, cannot create index template")
+            return False
+        
+        try:
+            self._request(
+                endpoint,
+                'PUT',
+                f"/_index_template/{template_name}",
+                body={
+                    'index_patterns': [index_pattern],
+                    'template': {
+                        'mappings': {
+                            'properties': {
+                                '@timestamp': {'type': 'date'}
+                            }
+                        }
+                    }
+                }
+            )
+            logger.info(f"Index template {template_name} created for {index_pattern}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to create index template {template_name}: {e}")
+            return False
+    
+    def _get_search_client(self, endpoint: str) -> "OpenSearch":
+        """
+        Get the OpenSearch client for an endpoint, creating it on first use
+        
+        Requests are signed with the session's IAM credentials. Transient
+        failures (429/502/503/504, timeouts) are retried by the client
+        transport.
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            
+        Returns:
+            OpenSearch client
+        """
+        client = self._search_clients.get(endpoint)
+        if client is not None:
+            return client
+        
+        if self._signer is None:
+            self._signer = AWSV4SignerAuth(self.session.get_credentials(), self.region, 'es')
+        
+        client = OpenSearch(
+            hosts=[endpoint],
+            http_auth=self._signer,
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=RequestsHttpConnection,
+            timeout=self.aws_config.get('bulk_timeout', 30),
+            max_retries=5,
+            retry_on_status=(429, 502, 503, 504),
+            retry_on_timeout=True,
+            pool_maxsize=4
+        )
+        self._search_clients[endpoint] = client
+        return client
+    
+    def _request(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        body: Optional[Any] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Send a signed request through the endpoint's pooled client
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            method: HTTP method
+            path: Request path (e.g., '/_index_template/name')
+            body: Request body (serialized as JSON)
+            params: Query string parameters
+            
+        Returns:
+            Decoded response body
+        """
+        client = self._get_search_client(endpoint)
+        return client.transport.perform_request(method, path, params=params, body=body)
+    
+    def _create_async_search_client(self, endpoint: str) -> "AsyncOpenSearch":
+        """
+        Create an aiohttp-based OpenSearch client signed with IAM credentials
+        
+        Must be created (and closed) inside the event loop that uses it.
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            
+        Returns:
+            AsyncOpenSearch client
+        """
+        if self._async_signer is None:
+            self._async_signer = AWSV4SignerAsyncAuth(self.session.get_credentials(), self.region, 'es')
+        
+        return AsyncOpenSearch(
+            hosts=[endpoint],
+            http_auth=self._async_signer,
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=AsyncHttpConnection,
+            timeout=self.aws_config.get('bulk_timeout', 30)
+        )
+    
+    def _test_index(self) -> str:
+        """Name of the index used by the bulk ingestion tests"""
+        return f"{self.aws_config.get('index_prefix', 'ids2-logs')}-test"
+    
+    def _apply_ingest_settings(self, endpoint: str, index: str) -> Dict[str, Any]:
+        """
+        Switch an index to INGEST_SETTINGS ahead of a bulk load
+        
+        Refreshing every 60s and dropping replicas cuts the per-document
+        indexing work while the load runs. The index is created with these
+        settings if it does not exist yet.
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            index: Index name
+            
+        Returns:
+            Previous values of the changed settings (None = cluster default),
+            to hand back to _restore_index_settings
+        """
+        try:
+            response = self._request(
+                endpoint, 'GET', f"/{index}/_settings", params={'flat_settings': 'true'}
+            )
+        except NotFoundError:
+            self._request(endpoint, 'PUT', f"/{index}", body={'settings': {'index': self.INGEST_SETTINGS}})
+            return {name: None for name in self.INGEST_SETTINGS}
+        
+        current = response.get(index, {}).get('settings', {})
+        original = {name: current.get(f"index.{name}") for name in self.INGEST_SETTINGS}
+        self._request(endpoint, 'PUT', f"/{index}/_settings", body={'index': self.INGEST_SETTINGS})
+        return original
+    
+    def _restore_index_settings(self, endpoint: str, index: str, original: Dict[str, Any]) -> None:
+        """
+        Put back the settings captured by _apply_ingest_settings
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            index: Index name
+            original: Settings returned by _apply_ingest_settings
+        """
+        try:
+            self._request(endpoint, 'PUT', f"/{index}/_settings", body={'index': original})
+        except Exception as e:
+            logger.warning(f"Failed to restore settings on {index}: {e}")
+    
+    def _bulk_actions(self, test_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build bulk index actions, largest documents first
+        
+        Each event is serialized once with orjson (the client passes string
+        sources through untouched). Sending documents in descending size
+        order packs bulk chunks evenly up to bulk_max_bytes instead of
+        leaving an under-filled chunk wherever a large document lands.
+        
+        Args:
+            test_events: Events to index
+            
+        Returns:
+            List of bulk actions
+        """
+        index = self._test_index()
+        sources = sorted(
+            (orjson.dumps(event).decode('utf-8') for event in test_events),
+            key=len,
+            reverse=True
+        )
+        return [{'_index': index, '_source': source} for source in sources]
     
     def test_bulk_ingestion(
         self,
@@ -195,18 +522,120 @@ class AWSManager:
         """
         Test bulk ingestion to OpenSearch
         
+        Events are sent with helpers.parallel_bulk, so several bulk chunks
+        are in flight at once on a small thread pool. Chunks are bounded
+        by bulk_max_bytes first and bulk_size documents second.
+        The test index runs with INGEST_SETTINGS while the load is in
+        progress; its previous settings are restored afterwards.
+        
         Args:
             endpoint: OpenSearch endpoint URL
             test_events: List of test events to ingest
             
         Returns:
-            True if successful
+            True if every event was indexed
         """
-        # This would use requests or aiohttp to send bulk data
-        # For now, this is a placeholder
-        logger.info(f"Bulk ingestion test would be implemented here")
-        logger.info(f"Endpoint: {endpoint}, Events: {len(test_events)}")
-        return True
+        if not OPENSEARCHPY_AVAILABLE:
+            logger.error("opensearch-py not available, cannot test bulk ingestion")
+            return False
+        
+        actions = self._bulk_actions(test_events)
+        
+        success = 0
+        failed = 0
+        
+        index = self._test_index()
+        
+        try:
+            original = self._apply_ingest_settings(endpoint, index)
+        except Exception as e:
+            logger.error(f"Failed to prepare {index} for bulk ingestion: {e}")
+            return False
+        
+        try:
+            client = self._get_search_client(endpoint)
+            for ok, item in helpers.parallel_bulk(
+                client,
+                actions,
+                chunk_size=self.aws_config.get('bulk_size', 100),
+                max_chunk_bytes=self.aws_config.get('bulk_max_bytes', 10 * 1024 * 1024),
+                thread_count=4,
+                raise_on_error=False
+            ):
+                if ok:
+                    success += 1
+                else:
+                    failed += 1
+                    logger.debug(f"Bulk item failed: {item}")
+                    
+        except Exception as e:
+            logger.error(f"Bulk ingestion failed: {e}")
+            return False
+        finally:
+            self._restore_index_settings(endpoint, index, original)
+        
+        logger.info(f"Bulk ingestion test complete - indexed: {success}, failed: {failed}")
+        return failed == 0
+    
+    async def test_bulk_ingestion_async(
+        self,
+        endpoint: str,
+        test_events: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        Test bulk ingestion to OpenSearch from an asyncio event loop
+        
+        Same behaviour as test_bulk_ingestion, but bulk chunks are sent
+        with helpers.async_bulk over aiohttp, so the caller's loop is never
+        blocked on network I/O. Rejected chunks (429) are retried with
+        exponential backoff. Index settings are handled as in
+        test_bulk_ingestion.
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            test_events: List of test events to ingest
+            
+        Returns:
+            True if every event was indexed
+        """
+        if not OPENSEARCHPY_AVAILABLE:
+            logger.error("opensearch-py not available, cannot test bulk ingestion")
+            return False
+        
+        actions = self._bulk_actions(test_events)
+        
+        index = self._test_index()
+        
+        try:
+            original = await asyncio.to_thread(self._apply_ingest_settings, endpoint, index)
+        except Exception as e:
+            logger.error(f"Failed to prepare {index} for bulk ingestion: {e}")
+            return False
+        
+        client = self._create_async_search_client(endpoint)
+        try:
+            success, errors = await helpers.async_bulk(
+                client,
+                actions,
+                chunk_size=self.aws_config.get('bulk_size', 100),
+                max_chunk_bytes=self.aws_config.get('bulk_max_bytes', 10 * 1024 * 1024),
+                max_retries=5,
+                initial_backoff=2,
+                max_backoff=60,
+                raise_on_error=False
+            )
+        except Exception as e:
+            logger.error(f"Bulk ingestion failed: {e}")
+            return False
+        finally:
+            await client.close()
+            await asyncio.to_thread(self._restore_index_settings, endpoint, index, original)
+        
+        for item in errors:
+            logger.debug(f"Bulk item failed: {item}")
+        
+        logger.info(f"Bulk ingestion test complete - indexed: {success}, failed: {len(errors)}")
+        return not errors
     
     def get_index_stats(self, endpoint: str, index_pattern: str) -> Optional[Dict[str, Any]]:
         """
@@ -219,10 +648,15 @@ class AWSManager:
         Returns:
             Statistics dictionary or None if failed
         """
-        # This would query OpenSearch for index stats
-        # For now, this is a placeholder
-        logger.info(f"Index stats query would be implemented here")
-        return None
+        if not OPENSEARCHPY_AVAILABLE:
+            logger.error("opensearch-py not available, cannot get index stats")
+            return None
+        
+        try:
+            return self._request(endpoint, 'GET', f"/{index_pattern}/_stats")
+        except Exception as e:
+            logger.error(f"Error getting index stats for {index_pattern}: {e}")
+            return None
     
     def verify_credentials(self) -> bool:
         """
@@ -233,8 +667,7 @@ class AWSManager:
         """
         try:
             # Try to get caller identity
-            sts = self.session.client('sts')
-            response = sts.get_caller_identity()
+            response = self.sts_client.get_caller_identity()
             
             account = response.get('Account')
             arn = response.get('Arn')
@@ -246,6 +679,30 @@ class AWSManager:
             logger.error(f"Failed to verify AWS credentials: {e}")
             return False
     
+    async def preflight(self, domain_name: str) -> Tuple[bool, bool]:
+        """
+        Verify credentials and domain concurrently
+        
+        The STS and DescribeDomain calls are independent, so they run in
+        worker threads side by side instead of back to back.
+        
+        Args:
+            domain_name: Name of the OpenSearch domain
+            
+        Returns:
+            Tuple of (credentials valid, domain exists and is active)
+        """
+        # Client creation on a shared boto3 session is not thread-safe, so
+        # build both clients here before handing the calls to threads
+        self.sts_client
+        self.opensearch_client
+        
+        creds_ok, domain_ok = await asyncio.gather(
+            asyncio.to_thread(self.verify_credentials),
+            asyncio.to_thread(self.verify_domain_exists, domain_name)
+        )
+        return creds_ok, domain_ok
+    
     def get_domain_info(self, domain_name: str) -> Optional[Dict[str, Any]]:
         """
         Get detailed domain information
@@ -257,11 +714,7 @@ class AWSManager:
             Domain information dictionary or None
         """
         try:
-            response = self.opensearch_client.describe_domain(
-                DomainName=domain_name
-            )
-            
-            domain_status = response['DomainStatus']
+            domain_status = self._describe_domain(domain_name)
             
             info = {
                 'domain_name': domain_status.get('DomainName'),
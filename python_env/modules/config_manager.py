@@ -11,13 +11,87 @@ import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+# Prefer the libyaml-backed loader/dumper (C implementation) when available
 try:
-    from modules.env_utils import resolve_env_placeholder, validate_env_placeholder
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
 except ImportError:
-    from env_utils import resolve_env_placeholder, validate_env_placeholder
+    from yaml import SafeLoader, SafeDumper
+    logging.warning("PyYAML built without libyaml, using pure-Python YAML loader")
+
+try:
+    from modules.env_utils import resolve_env_placeholder, resolve_many
+except ImportError:
+    from env_utils import resolve_env_placeholder, resolve_many
 
 logger = logging.getLogger(__name__)
 
+_REQUIRED_SECTIONS = frozenset({
+    'raspberry_pi',
+    'resources',
+    'aws',
+    'docker',
+    'vector',
+    'suricata',
+    'monitoring',
+    'git',
+    'opensearch_credentials',
+    'opensearch_creation',
+    'raspberry_pi_remote',
+    'testing',
+    'features',
+    'timeouts',
+    'retry',
+    'health_checks',
+})
+
+# (section, key, env var / placeholder, label) for credential placeholders
+# that must have their environment variable set
+_ENV_CHECKS = (
+    ('opensearch_credentials', 'master_user', "OPENSEARCH_MASTER_USER", "OpenSearch master_user"),
+    ('opensearch_credentials', 'master_pass', "OPENSEARCH_MASTER_PASS", "OpenSearch master_pass"),
+    ('monitoring', 'grafana_admin_user', "GRAFANA_ADMIN_USER", "Grafana admin user"),
+    ('monitoring', 'grafana_admin_password', "GRAFANA_ADMIN_PASSWORD", "Grafana admin password"),
+    ('git', 'author_name', "GIT_AUTHOR_NAME", "Git author name"),
+    ('git', 'author_email', "GIT_AUTHOR_EMAIL", "Git author email"),
+    ('git', 'committer_name', "GIT_COMMITTER_NAME", "Git committer name"),
+    ('git', 'committer_email', "GIT_COMMITTER_EMAIL", "Git committer email"),
+)
+
+# (resources key, min, max) for bounded resource limits. Missing keys fall
+# back to the defaults in get_resource_limits and are not checked.
+_BOUNDS = (
+    ('max_cpu_percent', 0, 100),
+    ('max_ram_percent', 0, 100),
+    ('throttle_threshold_1', 0, 100),
+    ('throttle_threshold_2', 0, 100),
+    ('throttle_threshold_3', 0, 100),
+)
+
+
+def _flatten(data: Dict[str, Any], prefix: str = '', out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Map every dot-notation key path in a nested dict to its value
+    
+    Intermediate sections are included too, so 'aws' maps to the aws
+    dictionary and 'aws.region' to the region string.
+    
+    Args:
+        data: Nested configuration dictionary
+        prefix: Key path of data within the root
+        out: Dictionary to fill (created if not provided)
+        
+    Returns:
+        Flat key path -> value dictionary
+    """
+    if out is None:
+        out = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        out[path] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{path}.", out)
+    return out
+
 
 class ConfigManager:
     """Manages configuration loading and validation"""
@@ -31,22 +105,47 @@ class ConfigManager:
         """
         self.config_path = Path(config_path)
         self.config: Dict[str, Any] = {}
+        # Dot-notation key -> value, rebuilt whenever self.config changes
+        self._flat: Dict[str, Any] = {}
+        # (mtime_ns, size) of the file the current config was parsed from
+        self._config_stamp: Optional[tuple] = None
+        # Sections with env placeholders resolved, built once per load
+        self._resolved_sections: Dict[str, Dict[str, Any]] = {}
+        # Environment snapshot used for placeholder checks and resolution
+        self._env: Dict[str, str] = {}
         self._load_config()
         self._validate_config()
     
     def _load_config(self) -> None:
         """Load configuration from YAML file"""
         try:
-            if not self.config_path.exists():
+            # Binary mode: the loader reads the file object directly and
+            # detects the encoding itself, with no text decoding layer
+            try:
+                f = open(self.config_path, 'rb')
+            except FileNotFoundError:
                 raise FileNotFoundError(f"Config file not found: {self.config_path}")
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                loaded_config = yaml.safe_load(f) or {}
+            with f:
+                # fstat the open file: the stamp describes exactly the file
+                # being parsed, even if config.yaml is replaced concurrently
+                st = os.fstat(f.fileno())
+                stamp = (st.st_mtime_ns, st.st_size)
+                
+                # Skip re-parsing on reload() if the file is unchanged
+                if stamp == self._config_stamp:
+                    logger.debug(f"Configuration unchanged, skipping reload of {self.config_path}")
+                    return
+                
+                loaded_config = yaml.load(f, Loader=SafeLoader) or {}
 
             if not isinstance(loaded_config, dict):
                 raise ValueError("Configuration root must be a mapping/object.")
 
             self.config = loaded_config
+            self._flat = _flatten(loaded_config)
+            self._config_stamp = stamp
+            self._resolved_sections.clear()
             
             logger.info(f"Configuration loaded from {self.config_path}")
         except Exception as e:
@@ -55,96 +154,34 @@ class ConfigManager:
     
     def _validate_config(self) -> None:
         """Validate required configuration sections"""
-        required_sections = [
-            'raspberry_pi',
-            'resources',
-            'aws',
-            'docker',
-            'vector',
-            'suricata',
-            'monitoring',
-            'git',
-            'opensearch_credentials',
-            'opensearch_creation',
-            'raspberry_pi_remote',
-            'testing',
-            'features',
-            'timeouts',
-            'retry',
-            'health_checks'
-        ]
+        # One copy of os.environ serves every placeholder lookup below and
+        # in the get_*_config getters, instead of one _Environ access each
+        self._env = dict(os.environ)
+        self._resolved_sections.clear()
         
-        missing = [s for s in required_sections if s not in self.config]
+        missing = _REQUIRED_SECTIONS.difference(self.config)
         if missing:
-            raise ValueError(f"Missing required config sections: {missing}")
+            raise ValueError(f"Missing required config sections: {sorted(missing)}")
         
         # Validate resource limits
         resources = self.config['resources']
-        if not (0 <= resources['max_cpu_percent'] <= 100):
-            raise ValueError("max_cpu_percent must be between 0 and 100")
-        if not (0 <= resources['max_ram_percent'] <= 100):
-            raise ValueError("max_ram_percent must be between 0 and 100")
+        for name, low, high in _BOUNDS:
+            value = resources.get(name)
+            if value is not None and not (low <= value <= high):
+                raise ValueError(f"{name} must be between {low} and {high}")
         
         # Validate network interface
         rpi = self.config['raspberry_pi']
         if rpi.get('network_interface') != 'eth0':
             logger.warning(f"Network interface is {rpi.get('network_interface')}, expected eth0")
 
-        # Validate OpenSearch credentials placeholders
-        opensearch_creds = self.config.get('opensearch_credentials', {})
-        validate_env_placeholder(
-            opensearch_creds.get('master_user'),
-            "OPENSEARCH_MASTER_USER",
-            "OPENSEARCH_MASTER_USER",
-            "OpenSearch master_user",
-        )
-        validate_env_placeholder(
-            opensearch_creds.get('master_pass'),
-            "OPENSEARCH_MASTER_PASS",
-            "OPENSEARCH_MASTER_PASS",
-            "OpenSearch master_pass",
-        )
-
-        # Validate Grafana credentials placeholders
-        monitoring_config = self.config.get('monitoring', {})
-        validate_env_placeholder(
-            monitoring_config.get('grafana_admin_user'),
-            "GRAFANA_ADMIN_USER",
-            "GRAFANA_ADMIN_USER",
-            "Grafana admin user",
-        )
-        validate_env_placeholder(
-            monitoring_config.get('grafana_admin_password'),
-            "GRAFANA_ADMIN_PASSWORD",
-            "GRAFANA_ADMIN_PASSWORD",
-            "Grafana admin password",
-        )
-
-        # Validate Git credentials placeholders
-        git_config = self.config.get('git', {})
-        validate_env_placeholder(
-            git_config.get('author_name'),
-            "GIT_AUTHOR_NAME",
-            "GIT_AUTHOR_NAME",
-            "Git author name",
-        )
-        validate_env_placeholder(
-            git_config.get('author_email'),
-            "GIT_AUTHOR_EMAIL",
-            "GIT_AUTHOR_EMAIL",
-            "Git author email",
-        )
-        validate_env_placeholder(
-            git_config.get('committer_name'),
-            "GIT_COMMITTER_NAME",
-            "GIT_COMMITTER_NAME",
-            "Git committer name",
-        )
-        validate_env_placeholder(
-            git_config.get('committer_email'),
-            "GIT_COMMITTER_EMAIL",
-            "GIT_COMMITTER_EMAIL",
-            "Git committer email",
+        # Validate credential placeholders (OpenSearch, Grafana, Git)
+        resolve_many(
+            [
+                (self.config.get(section, {}).get(key), env_var, env_var, label)
+                for section, key, env_var, label in _ENV_CHECKS
+            ],
+            env=self._env,
         )
         
         logger.info("Configuration validation passed")
@@ -160,16 +197,7 @@ class ConfigManager:
         Returns:
             Configuration value or default
         """
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
+        return self._flat.get(key, default)
     
     def get_section(self, section: str) -> Dict[str, Any]:
         """
@@ -193,15 +221,35 @@ class ConfigManager:
             'throttle_threshold_3': self.get('resources.throttle_threshold_3', 70.0),
         }
     
+    def _resolved_section(self, name: str, build) -> Dict[str, Any]:
+        """
+        Return a resolved section, building it on first use
+        
+        Args:
+            name: Cache key (section name)
+            build: Callable producing the resolved section dictionary
+            
+        Returns:
+            Shallow copy of the cached dictionary (safe for callers to mutate)
+        """
+        section = self._resolved_sections.get(name)
+        if section is None:
+            section = self._resolved_sections[name] = build()
+        return dict(section)
+    
     def get_aws_config(self) -> Dict[str, Any]:
         """Get AWS OpenSearch configuration, loading IAM user ARN from environment if placeholder is used."""
+        return self._resolved_section('aws', self._build_aws_config)
+    
+    def _build_aws_config(self) -> Dict[str, Any]:
         aws = self.get_section('aws')
         
-        aws['iam_user_arn'] = resolve_env_placeholder(
+        iam_user_arn = resolve_env_placeholder(
             aws.get('iam_user_arn'),
             "IAM_USER_ARN",
             "IAM_USER_ARN",
             "IAM user ARN",
+            env=self._env,
         )
 
         return {
@@ -209,9 +257,10 @@ class ConfigManager:
             'profile': aws.get('profile', 'moi33'),
             'domain_name': aws.get('opensearch_domain'),
             'endpoint': aws.get('opensearch_endpoint'),
-            'iam_user_arn': aws.get('iam_user_arn'),
+            'iam_user_arn': iam_user_arn,
             'index_prefix': aws.get('index_prefix', 'ids2-logs'),
             'bulk_size': aws.get('bulk_size', 100),
+            'bulk_max_bytes': aws.get('bulk_max_bytes', 10 * 1024 * 1024),
             'bulk_timeout': aws.get('bulk_timeout', 30),
         }
     
@@ -230,12 +279,14 @@ class ConfigManager:
             "OPENSEARCH_MASTER_USER",
             "OPENSEARCH_MASTER_USER",
             "OpenSearch master user",
+            env=self._env,
         )
         master_pass = resolve_env_placeholder(
             creds_config.get('master_pass'),
             "OPENSEARCH_MASTER_PASS",
             "OPENSEARCH_MASTER_PASS",
             "OpenSearch master password",
+            env=self._env,
         )
         
         return {
@@ -257,7 +308,10 @@ class ConfigManager:
     
     def get_monitoring_config(self) -> Dict[str, Any]:
         """Get monitoring configuration, loading Grafana credentials from environment if placeholders are used."""
-        monitoring = self.get_section('monitoring')
+        return self._resolved_section('monitoring', self._build_monitoring_config)
+    
+    def _build_monitoring_config(self) -> Dict[str, Any]:
+        monitoring = dict(self.get_section('monitoring'))
         
         monitoring['grafana_admin_user'] = resolve_env_placeholder(
             monitoring.get('grafana_admin_user'),
@@ -265,6 +319,7 @@ class ConfigManager:
             "GRAFANA_ADMIN_USER",
             "Grafana admin user",
             required=False,
+            env=self._env,
         )
         monitoring['grafana_admin_password'] = resolve_env_placeholder(
             monitoring.get('grafana_admin_password'),
@@ -272,42 +327,25 @@ class ConfigManager:
             "GRAFANA_ADMIN_PASSWORD",
             "Grafana admin password",
             required=False,
+            env=self._env,
         )
 
         return monitoring
     
     def get_git_config(self) -> Dict[str, Any]:
         """Get Git workflow configuration, loading user info from environment if placeholders are used."""
-        git_config = self.get_section('git')
+        return self._resolved_section('git', self._build_git_config)
+    
+    def _build_git_config(self) -> Dict[str, Any]:
+        git_config = dict(self.get_section('git'))
 
-        git_config['author_name'] = resolve_env_placeholder(
-            git_config.get('author_name'),
-            "GIT_AUTHOR_NAME",
-            "GIT_AUTHOR_NAME",
-            "Git author name",
-            required=False,
-        )
-        git_config['author_email'] = resolve_env_placeholder(
-            git_config.get('author_email'),
-            "GIT_AUTHOR_EMAIL",
-            "GIT_AUTHOR_EMAIL",
-            "Git author email",
-            required=False,
-        )
-        git_config['committer_name'] = resolve_env_placeholder(
-            git_config.get('committer_name'),
-            "GIT_COMMITTER_NAME",
-            "GIT_COMMITTER_NAME",
-            "Git committer name",
-            required=False,
-        )
-        git_config['committer_email'] = resolve_env_placeholder(
-            git_config.get('committer_email'),
-            "GIT_COMMITTER_EMAIL",
-            "GIT_COMMITTER_EMAIL",
-            "Git committer email",
+        git_checks = [check for check in _ENV_CHECKS if check[0] == 'git']
+        resolved = resolve_many(
+            [(git_config.get(key), env_var, env_var, label) for _, key, env_var, label in git_checks],
             required=False,
+            env=self._env,
         )
+        git_config.update(zip((check[1] for check in git_checks), resolved))
 
         return git_config
     
@@ -358,15 +396,37 @@ class ConfigManager:
         if 'aws' not in self.config:
             self.config['aws'] = {}
         self.config['aws']['opensearch_endpoint'] = endpoint
+        self._flat = _flatten(self.config)
+        self._resolved_sections.pop('aws', None)
         self._save_config()
         logger.info(f"OpenSearch endpoint updated to {endpoint} in {self.config_path}")
 
     def _save_config(self) -> None:
-        """Save the current configuration to the YAML file."""
+        """
+        Save the current configuration to the YAML file.
+
+        The file is written to a temporary sibling, fsynced and renamed over
+        the original, so readers never see a partially written config.
+        """
+        tmp_path = self.config_path.with_suffix(self.config_path.suffix + '.tmp')
         try:
-            with open(self.config_path, 'w') as f:
-                yaml.safe_dump(self.config, f, sort_keys=False)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                yaml.dump(self.config, f, Dumper=SafeDumper, sort_keys=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_path)
+
+            # The in-memory config already matches the new file
+            st = self.config_path.stat()
+            self._config_stamp = (st.st_mtime_ns, st.st_size)
+
             logger.info(f"Configuration saved to {self.config_path}")
         except Exception as e:
             logger.error(f"Failed to save configuration: {e}")
+            # Don't leave a partial temp file next to the config (it is
+            # already gone if the rename succeeded)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
             raise
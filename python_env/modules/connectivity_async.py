@@ -2,7 +2,7 @@
 Connectivity Checker Module (Process #3)
 
 Asynchronous connectivity verification using asyncio + uvloop.
-Runs DNS resolution, TLS handshake, and OpenSearch bulk tests in parallel.
+Checks DNS resolution, TLS handshake, and the OpenSearch bulk API.
 
 This runs as a separate process and updates shared state.
 """
@@ -13,7 +13,8 @@ import time
 import socket
 import ssl
 from typing import Dict, Any, Optional, Tuple
-from multiprocessing import Process
+from urllib.parse import urlsplit
+from multiprocessing import Process, Event
 
 try:
     import uvloop
@@ -22,165 +23,279 @@ except ImportError:
     UVLOOP_AVAILABLE = False
     logging.warning("uvloop not available, using default asyncio loop")
 
+try:
+    import aiodns
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+    logging.warning("aiodns not available, using the event loop's threaded resolver")
+
 import aiohttp
 from tenacity import (
     retry,
     stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
+    stop_after_delay,
+    wait_random_exponential,
+    retry_if_exception_type,
+    retry_if_not_exception_type
 )
 
+from modules.process_utils import set_parent_death_signal
+
 logger = logging.getLogger(__name__)
 
+# Minimal bulk request used to test the OpenSearch endpoint, encoded once
+_BULK_TEST_BODY = b'{"index":{"_index":"test"}}\n{"test":"connectivity"}\n'
+_BULK_HEADERS = {
+    'Content-Type': 'application/x-ndjson',
+    'Content-Length': str(len(_BULK_TEST_BODY)),
+}
+
+# Layered timeouts: a stuck TCP connect or handshake fails within seconds
+# (and is retried), while a slow but working server still gets time to
+# answer
+_BULK_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=3, sock_connect=3, sock_read=10)
+_TLS_PROBE_TIMEOUT = aiohttp.ClientTimeout(total=10, sock_connect=3)
+
 
 class ConnectivityChecker:
     """Asynchronous connectivity verification"""
     
-    def __init__(self, config_manager, shared_state: Dict[str, Any]):
+    # How long a successful DNS resolution is reused (seconds)
+    DNS_CACHE_TTL = 60.0
+    
+    # Upper bound on a single DNS resolution (seconds)
+    DNS_TIMEOUT = 5.0
+    
+    def __init__(
+        self,
+        config_manager,
+        shared_state: Dict[str, Any],
+        aws_ready_event: Optional[Event] = None
+    ):
         """
         Initialize connectivity checker
         
         Args:
             config_manager: Configuration manager instance
-            shared_state: Shared state dictionary from multiprocessing.Manager()
+            shared_state: Process-shared state (modules.shared_state.SharedState),
+                or a plain dict when run() is scheduled in-process
+            aws_ready_event: Event set while AWS connectivity is verified
         """
         self.config = config_manager
         self.shared_state = shared_state
+        self.aws_ready_event = aws_ready_event
         # Check interval
         self.check_interval = 30.0  # seconds
         
         # Process reference
         self.process: Process = None
         
+        # HTTP session shared by every check, opened inside the child's
+        # event loop (see run)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Trust store for every HTTPS check, parsed once in the child
+        # (SSLContext cannot be pickled for a spawned process)
+        self._ssl_ctx: Optional[ssl.SSLContext] = None
+        
+        # c-ares resolver (aiodns), likewise bound to the child's loop
+        self._resolver = None
+        
+        # Last endpoint seen and its parsed hostname
+        self._endpoint: Optional[str] = None
+        self._hostname: Optional[str] = None
+        
+        # hostname -> (ip address, monotonic time resolved)
+        self._dns_cache: Dict[str, Tuple[str, float]] = {}
+        
         # Initialize shared state
-        self.shared_state['dns_ok'] = False
-        self.shared_state['tls_ok'] = False
-        self.shared_state['opensearch_ok'] = False
-        self.shared_state['aws_ready'] = False
-        self.shared_state['last_connectivity_check'] = 0
+        self.shared_state.update({
+            'dns_ok': False,
+            'tls_ok': False,
+            'opensearch_ok': False,
+            'aws_ready': False,
+            'last_connectivity_check': 0,
+        })
+    
+    async def _resolve(self, hostname: str) -> Optional[str]:
+        """
+        Resolve a hostname to its first address
+        
+        Uses aiodns (c-ares) when installed, so lookups never occupy the
+        loop's thread pool; falls back to loop.getaddrinfo otherwise.
+        
+        Args:
+            hostname: Hostname to resolve
+            
+        Returns:
+            IP address, or None if there were no results
+        """
+        if AIODNS_AVAILABLE:
+            if self._resolver is None:
+                self._resolver = aiodns.DNSResolver()
+            result = await self._resolver.getaddrinfo(
+                hostname, port=443, type=socket.SOCK_STREAM
+            )
+            if not result.nodes:
+                return None
+            ip = result.nodes[0].addr[0]
+            return ip.decode() if isinstance(ip, bytes) else ip
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.getaddrinfo(
+            hostname, 443,
+            family=socket.AF_UNSPEC,
+            type=socket.SOCK_STREAM
+        )
+        return result[0][4][0] if result else None
     
     async def _check_dns(self, hostname: str) -> Tuple[bool, Optional[str]]:
         """
         Check DNS resolution
         
+        A successful resolution is reused for DNS_CACHE_TTL seconds; a
+        failure drops the cached entry so the next check resolves again.
+        
         Args:
             hostname: Hostname to resolve
             
         Returns:
             Tuple of (success, ip_address or error_message)
         """
+        cached = self._dns_cache.get(hostname)
+        if cached is not None and time.monotonic() - cached[1] < self.DNS_CACHE_TTL:
+            logger.debug(f"DNS resolution cached: {hostname} -> {cached[0]}")
+            return True, cached[0]
+        
         try:
-            loop = asyncio.get_event_loop()
-            # Resolve hostname
-            result = await loop.getaddrinfo(
-                hostname, 443,
-                family=socket.AF_UNSPEC,
-                type=socket.SOCK_STREAM
-            )
+            # Bounded, so a stuck resolver cannot stall the monitor loop
+            ip = await asyncio.wait_for(self._resolve(hostname), timeout=self.DNS_TIMEOUT)
             
-            if result:
-                ip = result[0][4][0]
+            if ip:
+                self._dns_cache[hostname] = (ip, time.monotonic())
                 logger.info(f"DNS resolution successful: {hostname} -> {ip}")
                 return True, ip
             else:
+                self._dns_cache.pop(hostname, None)
                 return False, "No DNS results"
                 
+        except asyncio.TimeoutError:
+            self._dns_cache.pop(hostname, None)
+            logger.error(f"DNS resolution timeout for {hostname}")
+            return False, "Timeout"
         except Exception as e:
+            self._dns_cache.pop(hostname, None)
             logger.error(f"DNS resolution failed for {hostname}: {e}")
             return False, str(e)
     
-    async def _check_tls(self, hostname: str, port: int = 443) -> Tuple[bool, Optional[str]]:
+    async def _check_tls(self, endpoint: str) -> bool:
         """
-        Check TLS handshake
+        Check the TLS handshake with a HEAD on the shared session
+        
+        Any HTTP response proves the handshake (and certificate check)
+        succeeded. Only used to diagnose a failed bulk probe.
         
         Args:
-            hostname: Hostname to connect to
-            port: Port number (default 443)
+            endpoint: OpenSearch endpoint URL
             
         Returns:
-            Tuple of (success, error_message if failed)
+            True if the handshake succeeded
         """
         try:
-            # Create SSL context
-            ssl_context = ssl.create_default_context()
-            
-            # Open connection with TLS
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(
-                    hostname, port,
-                    ssl=ssl_context,
-                    server_hostname=hostname
-                ),
-                timeout=10.0
-            )
-            
-            # Get peer certificate
-            ssl_object = writer.get_extra_info('ssl_object')
-            if ssl_object:
-                cert = ssl_object.getpeercert()
-                logger.info(f"TLS handshake successful with {hostname}")
-                logger.debug(f"Certificate subject: {cert.get('subject')}")
-            
-            # Close connection
-            writer.close()
-            await writer.wait_closed()
-            
-            return True, None
+            async with self._session.head(
+                endpoint,
+                allow_redirects=False,
+                timeout=_TLS_PROBE_TIMEOUT
+            ) as response:
+                logger.info(f"TLS handshake successful with {endpoint} (HTTP {response.status})")
+            return True
             
         except asyncio.TimeoutError:
-            logger.error(f"TLS handshake timeout for {hostname}:{port}")
-            return False, "Timeout"
+            logger.error(f"TLS handshake timeout for {endpoint}")
+            return False
         except Exception as e:
-            logger.error(f"TLS handshake failed for {hostname}:{port}: {e}")
-            return False, str(e)
+            logger.error(f"TLS handshake failed for {endpoint}: {e}")
+            return False
     
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError))
+        stop=(stop_after_attempt(3) | stop_after_delay(15)),
+        wait=wait_random_exponential(multiplier=1, max=5),
+        retry=(
+            retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)) &
+            retry_if_not_exception_type(aiohttp.ClientSSLError)
+        ),
+        reraise=True
     )
-    async def _check_opensearch_bulk(self, endpoint: str) -> Tuple[bool, Optional[str]]:
+    async def _post_bulk(self, url: str, data: bytes) -> Tuple[int, Any]:
         """
-        Check OpenSearch bulk API endpoint
+        POST a bulk body, retrying connection errors and timeouts
+        
+        Args:
+            url: Bulk API URL
+            data: Encoded NDJSON request body
+            
+        Returns:
+            Tuple of (HTTP status, decoded body on success or None)
+        """
+        async with self._session.post(
+            url,
+            data=data,
+            headers=_BULK_HEADERS,
+            timeout=_BULK_TIMEOUT
+        ) as response:
+            if response.status in [200, 201]:
+                return response.status, await response.json()
+            return response.status, None
+    
+    async def _probe_endpoint(self, endpoint: str, hostname: str) -> Tuple[bool, bool, bool]:
+        """
+        Check DNS, TLS and the bulk API with a single bulk POST
+        
+        One request through the keep-alive session exercises all three,
+        and the failure type tells which layer broke. A failure that does
+        not pin down the layer (refused connection, timeout) falls back to
+        the standalone DNS and TLS checks for diagnosis. Retries and
+        backoff together are capped just under check_interval, so a slow
+        endpoint cannot push a check into the next cycle.
         
         Args:
             endpoint: OpenSearch endpoint URL
+            hostname: Endpoint hostname
             
         Returns:
-            Tuple of (success, error_message if failed)
+            Tuple of (dns_ok, tls_ok, opensearch_ok)
         """
+        url = f"{endpoint}/_bulk"
+        
         try:
-            # Prepare test bulk request (minimal)
-            test_data = '{"index":{"_index":"test"}}\n{"test":"connectivity"}\n'
-            
-            url = f"{endpoint}/_bulk"
-            
-            timeout = aiohttp.ClientTimeout(total=30)
-            
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    url,
-                    data=test_data,
-                    headers={'Content-Type': 'application/x-ndjson'},
-                    ssl=False  # For testing; in production use proper SSL verification
-                ) as response:
-                    
-                    if response.status in [200, 201]:
-                        result = await response.json()
-                        logger.info(f"OpenSearch bulk test successful: {url}")
-                        logger.debug(f"Bulk response: {result}")
-                        return True, None
-                    else:
-                        error = f"HTTP {response.status}"
-                        logger.error(f"OpenSearch bulk test failed: {error}")
-                        return False, error
-                        
-        except asyncio.TimeoutError:
-            logger.error(f"OpenSearch bulk test timeout: {endpoint}")
-            return False, "Timeout"
+            status, result = await asyncio.wait_for(
+                self._post_bulk(url, _BULK_TEST_BODY),
+                timeout=self.check_interval - 2
+            )
+        except aiohttp.ClientConnectorDNSError as e:
+            logger.error(f"DNS resolution failed for {hostname}: {e}")
+            self._dns_cache.pop(hostname, None)
+            return False, False, False
+        except aiohttp.ClientSSLError as e:
+            logger.error(f"TLS handshake failed for {hostname}: {e}")
+            return True, False, False
         except Exception as e:
-            logger.error(f"OpenSearch bulk test failed: {e}")
-            return False, str(e)
+            if isinstance(e, asyncio.TimeoutError):
+                logger.error(f"OpenSearch bulk test timeout: {endpoint}")
+            else:
+                logger.error(f"OpenSearch bulk test failed: {e}")
+            dns_ok, _ = await self._check_dns(hostname)
+            tls_ok = dns_ok and await self._check_tls(endpoint)
+            return dns_ok, tls_ok, False
+        
+        if status in [200, 201]:
+            logger.info(f"OpenSearch bulk test successful: {url}")
+            logger.debug(f"Bulk response: {result}")
+            return True, True, True
+        
+        logger.error(f"OpenSearch bulk test failed: HTTP {status}")
+        return True, True, False
     
     def _get_opensearch_endpoint(self) -> Optional[str]:
         """Get the latest OpenSearch endpoint from shared state or config."""
@@ -189,11 +304,31 @@ class ConnectivityChecker:
             return shared_endpoint
         return self.config.get('aws.opensearch_endpoint')
 
+    def _get_hostname(self, endpoint: str) -> Optional[str]:
+        """
+        Hostname of an endpoint URL, parsed again only when the endpoint changes
+        
+        urlsplit handles ports, userinfo and IPv6 literals; an endpoint
+        without a scheme is treated as a bare host.
+        
+        Args:
+            endpoint: OpenSearch endpoint URL
+            
+        Returns:
+            Hostname, or None if the endpoint has none
+        """
+        if endpoint != self._endpoint:
+            parsed = urlsplit(endpoint if '//' in endpoint else f"//{endpoint}")
+            self._endpoint = endpoint
+            self._hostname = parsed.hostname
+        return self._hostname
+    
     async def _run_all_checks(self) -> None:
         """
-        Run all connectivity checks in parallel
+        Run all connectivity checks
         
-        This is the core async function that runs DNS, TLS, and bulk tests concurrently.
+        This is the core async function: one bulk request covers DNS, TLS
+        and the OpenSearch API (see _probe_endpoint).
         """
         endpoint = self._get_opensearch_endpoint()
         
@@ -202,72 +337,77 @@ class ConnectivityChecker:
             self.shared_state['aws_ready'] = False
             return
         
-        # Extract hostname from endpoint
-        hostname = endpoint.replace('https://', '').replace('http://', '').split('/')[0]
+        hostname = self._get_hostname(endpoint)
+        if not hostname:
+            logger.error(f"OpenSearch endpoint has no hostname: {endpoint}")
+            self.shared_state['aws_ready'] = False
+            return
         
         logger.info(f"Running connectivity checks for {hostname}...")
         
-        # Run checks in parallel
-        dns_task = self._check_dns(hostname)
-        tls_task = self._check_tls(hostname)
+        # Results are collected locally, published in one shared state write below
+        try:
+            dns_ok, tls_ok, opensearch_ok = await self._probe_endpoint(endpoint, hostname)
+        except Exception as e:
+            logger.error(f"Connectivity probe exception: {e}")
+            dns_ok = tls_ok = opensearch_ok = False
         
-        # Wait for DNS and TLS first
-        dns_result, tls_result = await asyncio.gather(
-            dns_task, tls_task,
-            return_exceptions=True
-        )
+        # Overall AWS readiness
+        aws_ready = dns_ok and tls_ok and opensearch_ok
         
-        # Update shared state
-        if isinstance(dns_result, tuple):
-            self.shared_state['dns_ok'] = dns_result[0]
-        else:
-            self.shared_state['dns_ok'] = False
-            logger.error(f"DNS check exception: {dns_result}")
-        
-        if isinstance(tls_result, tuple):
-            self.shared_state['tls_ok'] = tls_result[0]
-        else:
-            self.shared_state['tls_ok'] = False
-            logger.error(f"TLS check exception: {tls_result}")
-        
-        # Only run bulk test if DNS and TLS succeeded
-        if self.shared_state['dns_ok'] and self.shared_state['tls_ok']:
-            try:
-                bulk_result = await self._check_opensearch_bulk(endpoint)
-                self.shared_state['opensearch_ok'] = bulk_result[0]
-            except Exception as e:
-                logger.error(f"Bulk check exception: {e}")
-                self.shared_state['opensearch_ok'] = False
-        else:
-            logger.warning("Skipping bulk test due to DNS/TLS failure")
-            self.shared_state['opensearch_ok'] = False
-        
-        # Update overall AWS readiness
-        self.shared_state['aws_ready'] = (
-            self.shared_state['dns_ok'] and
-            self.shared_state['tls_ok'] and
-            self.shared_state['opensearch_ok']
-        )
+        self.shared_state.update({
+            'dns_ok': dns_ok,
+            'tls_ok': tls_ok,
+            'opensearch_ok': opensearch_ok,
+            'aws_ready': aws_ready,
+            'last_connectivity_check': time.time(),
+        })
         
-        self.shared_state['last_connectivity_check'] = time.time()
+        # Wake up anyone waiting on readiness
+        if self.aws_ready_event is not None:
+            if aws_ready:
+                self.aws_ready_event.set()
+            else:
+                self.aws_ready_event.clear()
         
         # Log summary
         logger.info(
             f"Connectivity check complete - "
-            f"DNS: {self.shared_state['dns_ok']}, "
-            f"TLS: {self.shared_state['tls_ok']}, "
-            f"Bulk: {self.shared_state['opensearch_ok']}, "
-            f"AWS Ready: {self.shared_state['aws_ready']}"
+            f"DNS: {dns_ok}, "
+            f"TLS: {tls_ok}, "
+            f"Bulk: {opensearch_ok}, "
+            f"AWS Ready: {aws_ready}"
         )
     
-    async def _monitor_loop(self) -> None:
+    async def run(self) -> None:
         """
         Main monitoring loop (async)
         
-        Periodically runs connectivity checks.
+        Periodically runs connectivity checks. One keep-alive session is
+        reused for every check, so the bulk test does not pay a fresh
+        TCP + TLS handshake each cycle.
+        
+        start() runs this in its own process. An application that already
+        has an event loop can instead schedule it directly with
+        asyncio.create_task(checker.run()), with a plain dict as
+        shared_state; cancel the task to stop it.
         """
         logger.info("Connectivity checker started")
         
+        if self._ssl_ctx is None:
+            self._ssl_ctx = ssl.create_default_context()
+        
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=self._ssl_ctx,
+                limit=10,
+                limit_per_host=2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            ),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        
         try:
             while True:
                 await self._run_all_checks()
@@ -277,6 +417,10 @@ class ConnectivityChecker:
             logger.info("Connectivity checker cancelled")
         except Exception as e:
             logger.error(f"Connectivity checker error: {e}", exc_info=True)
+        finally:
+            await self._session.close()
+            self._session = None
+            self._resolver = None
     
     def _run_async_loop(self) -> None:
         """
@@ -284,21 +428,17 @@ class ConnectivityChecker:
         
         Sets up uvloop (if available) and runs the async monitor loop.
         """
-        # Use uvloop if available for better performance
-        if UVLOOP_AVAILABLE:
-            uvloop.install()
-            logger.info("Using uvloop for async operations")
-        
-        # Create and run event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        set_parent_death_signal()
         
         try:
-            loop.run_until_complete(self._monitor_loop())
+            # Use uvloop if available for better performance
+            if UVLOOP_AVAILABLE:
+                logger.info("Using uvloop for async operations")
+                uvloop.run(self.run())
+            else:
+                asyncio.run(self.run())
         except KeyboardInterrupt:
             logger.info("Connectivity checker received shutdown signal")
-        finally:
-            loop.close()
     
     def start(self) -> None:
         """Start connectivity checking process"""
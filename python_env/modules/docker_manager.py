@@ -6,12 +6,16 @@ Monitors container health and resource usage.
 """
 
 import os
+import re
 import time
 import logging
 import subprocess
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 from pathlib import Path
 
+import orjson
+
 try:
     import docker
     from docker.errors import DockerException, APIError
@@ -39,11 +43,22 @@ class DockerManager:
         # Docker Compose file path
         self.compose_file = Path(self.docker_config.get('compose_file', 'docker/docker-compose.yml'))
         
-        # Docker client (if SDK available)
+        # Compose project name, passed to docker-compose explicitly so the
+        # com.docker.compose.project label is known in advance. Defaults to
+        # compose's own choice: the compose file's directory name.
+        self.project_name = self.docker_config.get('project_name') or re.sub(
+            r'[^a-z0-9_-]', '', self.compose_file.resolve().parent.name.lower()
+        )
+        
+        # Docker client (if SDK available), created once so its HTTP session
+        # keeps the daemon socket connections alive between polls
         self.client = None
         if DOCKER_SDK_AVAILABLE:
             try:
-                self.client = docker.from_env()
+                self.client = docker.from_env(
+                    max_pool_size=self.docker_config.get('max_pool_size', 4),
+                    timeout=self.docker_config.get('api_timeout', 30)
+                )
                 logger.info("Docker SDK client initialized")
             except DockerException as e:
                 logger.warning(f"Failed to initialize Docker SDK: {e}")
@@ -52,25 +67,36 @@ class DockerManager:
         # Service names
         self.services = ['vector', 'redis', 'prometheus', 'grafana']
     
-    def _run_compose_command(self, command: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    def _run_compose_command(
+        self,
+        command: List[str],
+        check: bool = True,
+        capture: bool = True
+    ) -> subprocess.CompletedProcess:
         """
         Run docker-compose command
         
         Args:
             command: Command arguments (e.g., ['up', '-d'])
             check: Whether to raise exception on non-zero exit
+            capture: Whether to capture output; pass False for commands
+                whose output is not parsed (pull, up, down...), which is
+                then discarded instead of buffered
             
         Returns:
             CompletedProcess result
         """
-        cmd = ['docker-compose', '-f', str(self.compose_file)] + command
+        cmd = ['docker-compose', '-f', str(self.compose_file), '-p', self.project_name] + command
         
         logger.debug(f"Running: {' '.join(cmd)}")
         
+        output = subprocess.PIPE if capture else subprocess.DEVNULL
+        
         try:
             result = subprocess.run(
                 cmd,
-                capture_output=True,
+                stdout=output,
+                stderr=output,
                 text=True,
                 check=check
             )
@@ -84,10 +110,64 @@ class DockerManager:
             
         except subprocess.CalledProcessError as e:
             logger.error(f"Command failed: {e}")
-            logger.error(f"stdout: {e.stdout}")
-            logger.error(f"stderr: {e.stderr}")
+            if capture:
+                logger.error(f"stdout: {e.stdout}")
+                logger.error(f"stderr: {e.stderr}")
             raise
     
+    def _service_labels(self, service: str) -> List[str]:
+        """
+        Label filters matching a service of this compose project only
+        
+        Args:
+            service: Service name
+            
+        Returns:
+            Label filters (all must match)
+        """
+        return [
+            f'com.docker.compose.project={self.project_name}',
+            f'com.docker.compose.service={service}',
+        ]
+    
+    def _list_service_containers(self, service: str) -> List[Any]:
+        """
+        List a compose service's containers (running or not) via the SDK
+        
+        Args:
+            service: Service name
+            
+        Returns:
+            List of docker Container objects
+        """
+        return self.client.containers.list(
+            all=True,
+            filters={'label': self._service_labels(service)}
+        )
+    
+    @staticmethod
+    def _parse_ps_json(output: str) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily parse `docker-compose ps --format json` output
+        
+        Compose v2 prints one JSON object per line; older releases print
+        a single JSON array. Both are accepted.
+        
+        Args:
+            output: Command stdout
+            
+        Yields:
+            One status dictionary per container
+        """
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            if isinstance(entry, list):
+                yield from entry
+            else:
+                yield entry
+    
     def verify_compose_file(self) -> bool:
         """
         Verify docker-compose.yml exists and is valid
@@ -127,11 +207,11 @@ class DockerManager:
             # Pull images if requested
             if pull:
                 logger.info("Pulling Docker images...")
-                self._run_compose_command(['pull'])
+                self._run_compose_command(['pull'], capture=False)
             
             # Start services
             logger.info("Starting services...")
-            self._run_compose_command(['up', '-d'])
+            self._run_compose_command(['up', '-d'], capture=False)
             
             logger.info("Docker Compose stack started")
             return True
@@ -152,7 +232,7 @@ class DockerManager:
         """
         try:
             logger.info("Stopping Docker Compose stack...")
-            self._run_compose_command(['down', '--timeout', str(timeout)])
+            self._run_compose_command(['down', '--timeout', str(timeout)], capture=False)
             logger.info("Docker Compose stack stopped")
             return True
             
@@ -172,7 +252,7 @@ class DockerManager:
         """
         try:
             logger.info(f"Restarting service: {service}")
-            self._run_compose_command(['restart', service])
+            self._run_compose_command(['restart', service], capture=False)
             logger.info(f"Service {service} restarted")
             return True
             
@@ -188,17 +268,23 @@ class DockerManager:
             service: Service name
             
         Returns:
-            Status dictionary or None if not found
+            Status dictionary or None if not found (container attrs
+            with the SDK, docker-compose ps JSON otherwise)
         """
+        if self.client:
+            try:
+                containers = self._list_service_containers(service)
+                return containers[0].attrs if containers else None
+            except (DockerException, APIError) as e:
+                logger.debug(f"Docker SDK status lookup failed, using CLI: {e}")
+        
         try:
             result = self._run_compose_command(['ps', '--format', 'json', service], check=False)
             
             if result.returncode == 0 and result.stdout:
-                import json
-                # Parse JSON output
-                status_list = json.loads(result.stdout)
-                if status_list:
-                    return status_list[0]
+                for entry in self._parse_ps_json(result.stdout):
+                    if entry.get('Service') == service:
+                        return entry
             
             return None
             
@@ -216,12 +302,52 @@ class DockerManager:
         Returns:
             True if running
         """
+        if self.client:
+            try:
+                containers = self._list_service_containers(service)
+                return any(c.status == 'running' for c in containers)
+            except (DockerException, APIError) as e:
+                logger.debug(f"Docker SDK status check failed, using CLI: {e}")
+        
         status = self.get_service_status(service)
         if status:
             state = status.get('State', '').lower()
             return state == 'running'
         return False
     
+    def _wait_for_start_event(self, service: str, since: float, until: float) -> bool:
+        """
+        Block on the daemon's event stream until the service starts
+        
+        Events are replayed from `since`, so a start that happened just
+        before subscribing is not missed; the daemon closes the stream at
+        `until`.
+        
+        Args:
+            service: Service name
+            since: Unix time to replay events from
+            until: Unix time at which to give up
+            
+        Returns:
+            True if the service started and is running
+        """
+        events = self.client.events(
+            since=int(since),
+            until=int(until) + 1,
+            filters={'type': 'container', 'label': self._service_labels(service)},
+            decode=True
+        )
+        try:
+            for event in events:
+                action = event.get('Action') or event.get('status') or ''
+                if action == 'start' or action == 'health_status: healthy':
+                    # A replayed event may predate a later stop
+                    if self.is_service_running(service):
+                        return True
+        finally:
+            events.close()
+        return False
+    
     def wait_for_service_healthy(
         self,
         service: str,
@@ -231,26 +357,50 @@ class DockerManager:
         """
         Wait for a service to become healthy
         
+        With the SDK this wakes on the container's start event instead of
+        polling. Otherwise the service is polled on a growing schedule,
+        starting at 100ms and capped at check_interval, so a fast start is
+        noticed almost at once.
+        
         Args:
             service: Service name
             max_wait: Maximum time to wait in seconds
-            check_interval: Time between checks in seconds
+            check_interval: Longest time between checks in seconds
             
         Returns:
             True if service becomes healthy
         """
         logger.info(f"Waiting for {service} to be healthy (max {max_wait}s)...")
         
+        # Wall clock for the daemon's event window, monotonic for our own
+        # deadline so clock steps (NTP, suspend) cannot stretch or cut it
         start_time = time.time()
+        deadline = time.monotonic() + max_wait
+        
+        if self.is_service_running(service):
+            logger.info(f"Service {service} is running")
+            return True
+        
+        if self.client:
+            try:
+                if self._wait_for_start_event(service, start_time, start_time + max_wait):
+                    logger.info(f"Service {service} is running")
+                    return True
+                logger.error(f"Timeout waiting for service {service}")
+                return False
+            except (DockerException, APIError) as e:
+                logger.debug(f"Docker event stream failed, polling instead: {e}")
         
-        while (time.time() - start_time) < max_wait:
+        delay = 0.1
+        while time.monotonic() < deadline:
             if self.is_service_running(service):
                 # Additional health check could be done here
                 logger.info(f"Service {service} is running")
                 return True
             
-            logger.debug(f"Service {service} not ready yet, waiting {check_interval}s...")
-            time.sleep(check_interval)
+            logger.debug(f"Service {service} not ready yet, waiting {delay:.1f}s...")
+            time.sleep(delay)
+            delay = min(delay * 1.5, check_interval)
         
         logger.error(f"Timeout waiting for service {service}")
         return False
@@ -279,13 +429,43 @@ class DockerManager:
         """
         Get status of all services in stack
         
+        One query covers the whole stack: a single containers.list on the
+        compose project label with the SDK, or a single docker-compose ps
+        otherwise.
+        
         Returns:
             Dictionary mapping service names to running status
         """
-        status = {}
-        for service in self.services:
-            status[service] = self.is_service_running(service)
-        return status
+        running = set()
+        
+        if self.client:
+            try:
+                containers = self.client.containers.list(
+                    all=True,
+                    filters={'label': f'com.docker.compose.project={self.project_name}'}
+                )
+                running = {
+                    c.labels.get('com.docker.compose.service')
+                    for c in containers
+                    if c.status == 'running'
+                }
+                return {service: service in running for service in self.services}
+            except (DockerException, APIError) as e:
+                logger.debug(f"Docker SDK stack status failed, using CLI: {e}")
+        
+        try:
+            result = self._run_compose_command(['ps', '--format', 'json'], check=False)
+            
+            if result.returncode == 0 and result.stdout:
+                running = {
+                    entry.get('Service')
+                    for entry in self._parse_ps_json(result.stdout)
+                    if entry.get('State', '').lower() == 'running'
+                }
+        except Exception as e:
+            logger.error(f"Error getting stack status: {e}")
+        
+        return {service: service in running for service in self.services}
     
     def get_container_logs(self, service: str, tail: int = 50) -> Optional[str]:
         """
@@ -298,6 +478,15 @@ class DockerManager:
         Returns:
             Log output or None
         """
+        if self.client:
+            try:
+                containers = self._list_service_containers(service)
+                if not containers:
+                    return None
+                return containers[0].logs(tail=tail).decode('utf-8', errors='replace')
+            except (DockerException, APIError) as e:
+                logger.debug(f"Docker SDK log fetch failed, using CLI: {e}")
+        
         try:
             result = self._run_compose_command(
                 ['logs', '--tail', str(tail), service],
@@ -330,20 +519,25 @@ class DockerManager:
         try:
             # Get container by service name
             containers = self.client.containers.list(
-                filters={'label': f'com.docker.compose.service={service}'}
+                filters={'label': self._service_labels(service)}
             )
             
             if not containers:
                 return None
             
             container = containers[0]
-            stats = container.stats(stream=False)
+            # one_shot: a single sample, without the daemon's ~1s wait for a
+            # second one. precpu_stats may then be empty, in which case the
+            # deltas below run from zero (average since container start).
+            stats = container.stats(stream=False, one_shot=True)
             
             # Parse stats
-            cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - \
-                       stats['precpu_stats']['cpu_usage']['total_usage']
-            system_delta = stats['cpu_stats']['system_cpu_usage'] - \
-                          stats['precpu_stats']['system_cpu_usage']
+            cpu_stats = stats['cpu_stats']
+            precpu_stats = stats.get('precpu_stats') or {}
+            cpu_delta = cpu_stats['cpu_usage']['total_usage'] - \
+                       precpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+            system_delta = cpu_stats.get('system_cpu_usage', 0) - \
+                          precpu_stats.get('system_cpu_usage', 0)
             
             cpu_percent = 0.0
             if system_delta > 0:
@@ -364,6 +558,20 @@ class DockerManager:
             logger.error(f"Error getting stats for {service}: {e}")
             return None
     
+    def get_stack_stats(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get resource usage stats for every service in the stack
+        
+        Services are sampled on a small thread pool, so daemons that
+        ignore one_shot (and take ~1s per sample) cost ~1s in total
+        rather than ~1s per service.
+        
+        Returns:
+            Dictionary mapping service names to stats (or None)
+        """
+        with ThreadPoolExecutor(max_workers=len(self.services)) as executor:
+            return dict(zip(self.services, executor.map(self.get_container_stats, self.services)))
+    
     def cleanup(self, volumes: bool = False) -> bool:
         """
         Clean up Docker resources
@@ -381,7 +589,7 @@ class DockerManager:
             if volumes:
                 cmd.append('--volumes')
             
-            self._run_compose_command(cmd)
+            self._run_compose_command(cmd, capture=False)
             logger.info("Docker cleanup complete")
             return True
             
@@ -3,15 +3,21 @@ Environment utility helpers for configuration placeholders.
 """
 
 import os
-from typing import Optional
+from typing import Iterable, List, Mapping, Optional, Tuple
 
+# Live alias of os.environ, saving the attribute lookup on each call
+_ENV = os.environ
 
-def validate_env_placeholder(value: Optional[str], placeholder: str, env_var: str, label: str) -> None:
+
+def validate_env_placeholder(
+    value: Optional[str],
+    placeholder: str,
+    env_var: str,
+    label: str,
+    env: Optional[Mapping[str, str]] = None,
+) -> None:
     """Validate that an environment variable is set if placeholder is used."""
-    if value == placeholder and not os.getenv(env_var):
-        raise ValueError(
-            f"{label} is set to placeholder but environment variable '{env_var}' is not set."
-        )
+    resolve_env_placeholder(value, placeholder, env_var, label, required=True, env=env)
 
 
 def resolve_env_placeholder(
@@ -20,6 +26,7 @@ def resolve_env_placeholder(
     env_var: str,
     label: str,
     required: bool = True,
+    env: Optional[Mapping[str, str]] = None,
 ) -> Optional[str]:
     """
     Resolve placeholder values to environment variables.
@@ -30,15 +37,40 @@ def resolve_env_placeholder(
         env_var: Environment variable to use when placeholder matches.
         label: Human-readable label for error messaging.
         required: Whether env var must be set when placeholder matches.
+        env: Environment snapshot to read from (defaults to os.environ).
 
     Returns:
         Resolved value (env var) or original value.
     """
     if value == placeholder:
-        resolved = os.getenv(env_var)
+        resolved = (_ENV if env is None else env).get(env_var)
         if required and not resolved:
             raise ValueError(
                 f"{label} is set to placeholder but environment variable '{env_var}' is not set."
             )
         return resolved
     return value
+
+
+def resolve_many(
+    items: Iterable[Tuple[Optional[str], str, str, str]],
+    required: bool = True,
+    env: Optional[Mapping[str, str]] = None,
+) -> List[Optional[str]]:
+    """
+    Resolve several placeholder values in one pass.
+
+    Args:
+        items: (value, placeholder, env_var, label) tuples.
+        required: Whether env vars must be set when placeholders match.
+        env: Environment snapshot to read from (defaults to os.environ).
+
+    Returns:
+        Resolved values, in the order of items.
+    """
+    if env is None:
+        env = _ENV
+    return [
+        resolve_env_placeholder(value, placeholder, env_var, label, required, env)
+        for value, placeholder, env_var, label in items
+    ]
@@ -0,0 +1,44 @@
+"""
+File utility helpers for generated configuration files.
+"""
+
+import os
+import hashlib
+from pathlib import Path
+from typing import Any, Mapping, Optional, Tuple
+
+
+def inputs_key(inputs: Mapping[str, Any]) -> bytes:
+    """Return a short digest identifying a set of generator inputs."""
+    return hashlib.blake2b(repr(sorted(inputs.items())).encode('utf-8'), digest_size=16).digest()
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Return (size, mtime_ns) of a file, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def file_matches(path: Path, data: bytes) -> bool:
+    """Check whether a file already holds exactly the given bytes."""
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except OSError:
+        return False
+
+
+def write_file(path: Path, data: bytes, mode: int = 0o644) -> None:
+    """Write bytes to a file with a single unbuffered write, synced before close."""
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
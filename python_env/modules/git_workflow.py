@@ -6,13 +6,61 @@ Ensures work is done on 'dev' branch and commits/pushes changes.
 """
 
 import os
+import asyncio
+import atexit
 import logging
+import threading
 import subprocess
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+
+try:
+    import pygit2
+    from pygit2.enums import FileStatus
+    PYGIT2_AVAILABLE = True
+except ImportError:
+    PYGIT2_AVAILABLE = False
+    logging.warning("pygit2 not available, using git CLI for all operations")
 
 logger = logging.getLogger(__name__)
 
+# commit_and_push as one shell process: branch check, stage, commit and
+# push. $MSG and $REQUIRED_BRANCH come from the environment, so the
+# commit message is never interpolated into the script.
+_COMMIT_AND_PUSH_SCRIPT = '''
+branch=$(git symbolic-ref --short -q HEAD) || exit 3
+[ "$branch" = "$REQUIRED_BRANCH" ] || { echo "$branch"; exit 4; }
+git add -A || exit 5
+git diff --cached --quiet && exit 10
+git commit -q -m "$MSG" || exit 6
+git push origin "$branch" || exit 7
+'''
+
+# Exit status of _COMMIT_AND_PUSH_SCRIPT -> failure description
+_COMMIT_AND_PUSH_ERRORS = {
+    3: "Could not determine current branch",
+    4: "Cannot commit: not on required branch",
+    5: "Failed to stage changes",
+    6: "Failed to commit",
+    7: "Failed to push",
+}
+
+if PYGIT2_AVAILABLE:
+    # (flag, short status letter) for the index (X) and worktree (Y) columns
+    _INDEX_CODES = (
+        (FileStatus.INDEX_NEW, 'A'),
+        (FileStatus.INDEX_MODIFIED, 'M'),
+        (FileStatus.INDEX_DELETED, 'D'),
+        (FileStatus.INDEX_RENAMED, 'R'),
+        (FileStatus.INDEX_TYPECHANGE, 'T'),
+    )
+    _WORKTREE_CODES = (
+        (FileStatus.WT_MODIFIED, 'M'),
+        (FileStatus.WT_DELETED, 'D'),
+        (FileStatus.WT_RENAMED, 'R'),
+        (FileStatus.WT_TYPECHANGE, 'T'),
+    )
+
 
 class GitWorkflow:
     """Manages Git workflow operations"""
@@ -32,55 +80,191 @@ class GitWorkflow:
         
         # Repository root
         self.repo_root = Path.cwd()
+        
+        # In-process repository handle for read-only queries (no git
+        # fork/exec); None falls back to the CLI
+        self._repo = None
+        if PYGIT2_AVAILABLE:
+            try:
+                repo_path = pygit2.discover_repository(str(self.repo_root))
+                if repo_path:
+                    self._repo = pygit2.Repository(repo_path)
+            except pygit2.GitError as e:
+                logger.warning(f"Failed to open repository with pygit2: {e}")
+        
+        # Memoized lookups; the branch only changes through checkout_branch()
+        # within a run (call invalidate_cache() after external changes)
+        self._branch_cache: Optional[str] = None
+        self._remote_url_cache: Dict[str, str] = {}
+        
+        # Long-running `git cat-file --batch`, started on first read_object()
+        self._catfile: Optional[subprocess.Popen] = None
+        self._catfile_lock = threading.Lock()
+        atexit.register(self.close)
     
-    def _run_git_command(self, args: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    @staticmethod
+    def _format_status(status: Dict[str, int]) -> str:
+        """
+        Render pygit2 status flags like `git status --short`
+        
+        Args:
+            status: Mapping of path to FileStatus flags
+            
+        Returns:
+            One 'XY path' line per changed file
+        """
+        lines = []
+        for path, flags in sorted(status.items()):
+            if flags & FileStatus.IGNORED:
+                continue
+            if flags & FileStatus.CONFLICTED:
+                code = 'UU'
+            elif flags == FileStatus.WT_NEW:
+                code = '??'
+            else:
+                x = next((c for flag, c in _INDEX_CODES if flags & flag), ' ')
+                y = next((c for flag, c in _WORKTREE_CODES if flags & flag), ' ')
+                code = x + y
+            lines.append(f"{code} {path}\n")
+        return ''.join(lines)
+    
+    def _run_git_command(
+        self,
+        args: List[str],
+        check: bool = True,
+        capture: bool = True
+    ) -> subprocess.CompletedProcess:
         """
         Run git command
         
         Args:
             args: Git command arguments
             check: Whether to raise exception on non-zero exit
+            capture: Whether to capture stdout; pass False for commands
+                whose output is not read (add, commit, push...). stderr is
+                always captured for error logging
             
         Returns:
             CompletedProcess result
         """
-        cmd = ['git'] + args
+        cmd = ('git', *args)
+        debug = logger.isEnabledFor(logging.DEBUG)
         
-        logger.debug(f"Running: {' '.join(cmd)}")
+        if debug:
+            logger.debug("Running: %s", ' '.join(cmd))
         
         try:
             result = subprocess.run(
                 cmd,
                 cwd=self.repo_root,
-                capture_output=True,
+                stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
                 check=check
             )
             
-            if result.stdout:
-                logger.debug(f"stdout: {result.stdout.strip()}")
-            if result.stderr:
-                logger.debug(f"stderr: {result.stderr.strip()}")
+            if debug:
+                if result.stdout:
+                    logger.debug("stdout: %s", result.stdout.strip())
+                if result.stderr:
+                    logger.debug("stderr: %s", result.stderr.strip())
             
             return result
             
         except subprocess.CalledProcessError as e:
             logger.error(f"Git command failed: {e}")
-            logger.error(f"stdout: {e.stdout}")
+            if capture:
+                logger.error(f"stdout: {e.stdout}")
             logger.error(f"stderr: {e.stderr}")
             raise
     
+    def invalidate_cache(self) -> None:
+        """Forget memoized branch and remote URL lookups"""
+        self._branch_cache = None
+        self._remote_url_cache.clear()
+    
+    async def _run_git_command_async(self, args: List[str]) -> Optional[str]:
+        """
+        Run a read-only git command without blocking the event loop
+        
+        Args:
+            args: Git command arguments
+            
+        Returns:
+            Stripped stdout, or None on non-zero exit
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running: git %s", ' '.join(args))
+        
+        proc = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=self.repo_root,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+        
+        if proc.returncode != 0:
+            logger.error(f"Git command failed: git {' '.join(args)}: {stderr.decode().strip()}")
+            return None
+        return stdout.decode()
+    
+    async def gather_status(self, remote: str = 'origin') -> Dict[str, Any]:
+        """
+        Collect branch, status, last commit and remote URL at once
+        
+        With pygit2 these are in-process lookups; otherwise the four git
+        commands run concurrently, so the wait is the slowest one rather
+        than the sum.
+        
+        Args:
+            remote: Remote name
+            
+        Returns:
+            Dictionary with 'branch', 'status', 'commit' and 'remote_url'
+            (None where a lookup failed)
+        """
+        if self._repo is not None:
+            return {
+                'branch': self.get_current_branch(),
+                'status': self.get_status(),
+                'commit': self.get_last_commit_hash(),
+                'remote_url': self.get_remote_url(remote),
+            }
+        
+        branch, status, commit, remote_url = await asyncio.gather(
+            self._run_git_command_async(['branch', '--show-current']),
+            self._run_git_command_async(['status', '--short']),
+            self._run_git_command_async(['rev-parse', 'HEAD']),
+            self._run_git_command_async(['remote', 'get-url', remote])
+        )
+        return {
+            'branch': (branch or '').strip() or None,
+            'status': status,
+            'commit': commit.strip() if commit is not None else None,
+            'remote_url': remote_url.strip() if remote_url is not None else None,
+        }
+    
     def get_current_branch(self) -> Optional[str]:
         """
-        Get current Git branch name
+        Get current Git branch name (memoized)
         
         Returns:
             Branch name or None if failed
         """
+        if self._branch_cache is not None:
+            return self._branch_cache
+        
         try:
-            result = self._run_git_command(['branch', '--show-current'])
-            branch = result.stdout.strip()
-            return branch if branch else None
+            if self._repo is not None and not self._repo.head_is_unborn:
+                # Detached HEAD has no current branch (like --show-current)
+                branch = None if self._repo.head_is_detached else self._repo.head.shorthand
+            else:
+                result = self._run_git_command(['branch', '--show-current'])
+                branch = result.stdout.strip() or None
+            
+            self._branch_cache = branch
+            return branch
         except Exception as e:
             logger.error(f"Failed to get current branch: {e}")
             return None
@@ -125,7 +309,8 @@ class GitWorkflow:
                 args.append('-b')
             args.append(branch)
             
-            self._run_git_command(args)
+            self._run_git_command(args, capture=False)
+            self._branch_cache = branch
             logger.info(f"Checked out branch: {branch}")
             return True
             
@@ -141,6 +326,9 @@ class GitWorkflow:
             Status output or None
         """
         try:
+            if self._repo is not None:
+                return self._format_status(self._repo.status())
+            
             result = self._run_git_command(['status', '--short'])
             return result.stdout
         except Exception as e:
@@ -154,8 +342,33 @@ class GitWorkflow:
         Returns:
             True if there are changes
         """
-        status = self.get_status()
-        return bool(status and status.strip())
+        if self._repo is not None:
+            try:
+                return any(
+                    flags not in (FileStatus.CURRENT, FileStatus.IGNORED)
+                    for flags in self._repo.status().values()
+                )
+            except pygit2.GitError as e:
+                logger.debug(f"pygit2 status failed, using CLI: {e}")
+        
+        # Only the first byte matters: stop git as soon as it reports
+        # one entry instead of reading the whole listing
+        try:
+            proc = subprocess.Popen(
+                ['git', 'status', '--porcelain=v1', '-z', '--no-renames'],
+                cwd=self.repo_root,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.error(f"Failed to get status: {e}")
+            return False
+        
+        with proc:
+            dirty = bool(proc.stdout.read(1))
+            if dirty:
+                proc.kill()
+        return dirty
     
     def add_all(self) -> bool:
         """
@@ -165,7 +378,7 @@ class GitWorkflow:
             True if successful
         """
         try:
-            self._run_git_command(['add', '-A'])
+            self._run_git_command(['add', '-A'], capture=False)
             logger.info("Staged all changes")
             return True
         except Exception as e:
@@ -183,7 +396,7 @@ class GitWorkflow:
             True if successful
         """
         try:
-            self._run_git_command(['commit', '-m', message])
+            self._run_git_command(['commit', '-m', message], capture=False)
             logger.info(f"Committed changes: {message}")
             return True
         except Exception as e:
@@ -209,7 +422,7 @@ class GitWorkflow:
                 logger.error("Could not determine branch to push")
                 return False
             
-            self._run_git_command(['push', remote, branch])
+            self._run_git_command(['push', remote, branch], capture=False)
             logger.info(f"Pushed to {remote}/{branch}")
             return True
             
@@ -221,34 +434,46 @@ class GitWorkflow:
         """
         Stage all changes, commit, and push
         
+        Runs as a single shell process (see _COMMIT_AND_PUSH_SCRIPT)
+        instead of one git exec per step.
+        
         Args:
             message: Commit message
             
         Returns:
             True if successful
         """
-        # Check if on required branch
-        if not self.verify_on_required_branch():
-            logger.error("Cannot commit: not on required branch")
+        env = dict(os.environ, MSG=message, REQUIRED_BRANCH=self.required_branch)
+        
+        try:
+            result = subprocess.run(
+                ['sh', '-c', _COMMIT_AND_PUSH_SCRIPT],
+                cwd=self.repo_root,
+                env=env,
+                capture_output=True,
+                text=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to commit and push: {e}")
             return False
         
-        # Check if there are changes
-        if not self.has_changes():
+        if result.returncode == 10:
             logger.info("No changes to commit")
             return True
         
-        # Stage changes
-        if not self.add_all():
-            return False
-        
-        # Commit
-        if not self.commit(message):
-            return False
-        
-        # Push
-        if not self.push():
+        if result.returncode != 0:
+            error = _COMMIT_AND_PUSH_ERRORS.get(result.returncode, "Commit and push failed")
+            if result.returncode == 4:
+                error = (
+                    f"{error} '{self.required_branch}' "
+                    f"(current: '{result.stdout.strip()}')"
+                )
+            logger.error(error)
+            if result.stderr:
+                logger.error(f"stderr: {result.stderr.strip()}")
             return False
         
+        logger.info(f"Committed changes: {message}")
         logger.info("Successfully committed and pushed changes")
         return True
     
@@ -271,7 +496,7 @@ class GitWorkflow:
                 logger.error("Could not determine branch to pull")
                 return False
             
-            self._run_git_command(['pull', remote, branch])
+            self._run_git_command(['pull', remote, branch], capture=False)
             logger.info(f"Pulled from {remote}/{branch}")
             return True
             
@@ -287,6 +512,9 @@ class GitWorkflow:
             Commit hash or None
         """
         try:
+            if self._repo is not None:
+                return str(self._repo.head.target)
+            
             result = self._run_git_command(['rev-parse', 'HEAD'])
             return result.stdout.strip()
         except Exception as e:
@@ -295,7 +523,7 @@ class GitWorkflow:
     
     def get_remote_url(self, remote: str = 'origin') -> Optional[str]:
         """
-        Get URL of remote repository
+        Get URL of remote repository (memoized)
         
         Args:
             remote: Remote name
@@ -303,9 +531,79 @@ class GitWorkflow:
         Returns:
             Remote URL or None
         """
+        url = self._remote_url_cache.get(remote)
+        if url is not None:
+            return url
+        
         try:
-            result = self._run_git_command(['remote', 'get-url', remote])
-            return result.stdout.strip()
+            if self._repo is not None:
+                url = self._repo.remotes[remote].url
+            else:
+                result = self._run_git_command(['remote', 'get-url', remote])
+                url = result.stdout.strip()
+            
+            self._remote_url_cache[remote] = url
+            return url
         except Exception as e:
             logger.error(f"Failed to get remote URL: {e}")
             return None
+    
+    def read_object(self, spec: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Read a Git object through a persistent `git cat-file --batch`
+        
+        The process is started once and fed one object name per line, so
+        repeated lookups cost a pipe round trip instead of a git exec.
+        
+        Args:
+            spec: Object name (e.g., 'HEAD:config.yaml' or a SHA)
+            
+        Returns:
+            Tuple of (object type, content) or None if not found
+        """
+        with self._catfile_lock:
+            try:
+                if self._catfile is None or self._catfile.poll() is not None:
+                    self._catfile = subprocess.Popen(
+                        ['git', 'cat-file', '--batch'],
+                        cwd=self.repo_root,
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL
+                    )
+                
+                self._catfile.stdin.write(spec.encode('utf-8') + b'\n')
+                self._catfile.stdin.flush()
+                
+                # "<sha> <type> <size>" then the content and a newline, or
+                # "<spec> missing" / "<spec> ambiguous"
+                header = self._catfile.stdout.readline().split()
+                if len(header) != 3:
+                    if not header:
+                        raise RuntimeError("git cat-file exited")
+                    return None
+                
+                size = int(header[2])
+                content = self._catfile.stdout.read(size + 1)[:size]
+                return header[1].decode('ascii'), content
+                
+            except Exception as e:
+                logger.error(f"Failed to read object {spec}: {e}")
+                self._close_catfile()
+                return None
+    
+    def _close_catfile(self) -> None:
+        """Stop the cat-file process, if running"""
+        if self._catfile is None:
+            return
+        try:
+            self._catfile.stdin.close()
+            self._catfile.wait(timeout=5)
+        except Exception:
+            self._catfile.kill()
+        self._catfile = None
+    
+    def close(self) -> None:
+        """Release the persistent cat-file process"""
+        with self._catfile_lock:
+            self._close_catfile()
@@ -7,20 +7,76 @@ Publishes system metrics, pipeline metrics, and health status.
 This runs as a separate process.
 """
 
-import time
 import logging
+import threading
 from typing import Dict, Any
 from multiprocessing import Process
 from prometheus_client import (
     start_http_server,
-    Gauge,
     Counter,
     Histogram,
-    Info
+    Info,
+    REGISTRY
 )
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from modules.process_utils import demote_priority, pin_to_cpus, set_parent_death_signal
 
 logger = logging.getLogger(__name__)
 
+# (metric name, help, shared state field) for gauges read from shared
+# state; booleans are exported as 1/0
+_GAUGE_FIELDS = (
+    # System metrics
+    ('ids2_cpu_usage_percent', 'Current CPU usage percentage', 'cpu_percent'),
+    ('ids2_ram_usage_percent', 'Current RAM usage percentage', 'ram_percent'),
+    ('ids2_throttle_level', 'Current throttling level (0-3)', 'throttle_level'),
+    
+    # Connectivity metrics
+    ('ids2_dns_status', 'DNS connectivity status (1=ok, 0=fail)', 'dns_ok'),
+    ('ids2_tls_status', 'TLS connectivity status (1=ok, 0=fail)', 'tls_ok'),
+    ('ids2_opensearch_status', 'OpenSearch connectivity status (1=ok, 0=fail)', 'opensearch_ok'),
+    ('ids2_aws_ready', 'AWS overall readiness (1=ready, 0=not ready)', 'aws_ready'),
+    
+    # Pipeline metrics
+    ('ids2_vector_status', 'Vector service status (1=running, 0=stopped)', 'vector_running'),
+    ('ids2_suricata_status', 'Suricata service status (1=running, 0=stopped)', 'suricata_running'),
+    ('ids2_redis_status', 'Redis service status (1=running, 0=stopped)', 'redis_running'),
+    ('ids2_pipeline_ok', 'Overall pipeline health (1=ok, 0=degraded)', 'pipeline_ok'),
+)
+
+# (metric name, help, shared state field) for counters whose running
+# totals are kept in shared state
+_COUNTER_FIELDS = (
+    ('ids2_events_processed', 'Total number of events processed', 'events_processed'),
+    ('ids2_events_failed', 'Total number of events that failed processing', 'events_failed'),
+)
+
+
+class SharedStateCollector(Collector):
+    """Prometheus collector reading shared state at scrape time"""
+    
+    def __init__(self, shared_state: Dict[str, Any]):
+        """
+        Initialize collector
+        
+        Args:
+            shared_state: Process-shared state (modules.shared_state.SharedState)
+        """
+        self.shared_state = shared_state
+    
+    def collect(self):
+        """Yield one metric family per shared state field"""
+        # One consistent copy of the shared state per scrape
+        state = self.shared_state.snapshot()
+        
+        for name, documentation, field in _GAUGE_FIELDS:
+            yield GaugeMetricFamily(name, documentation, value=float(state.get(field, 0)))
+        
+        for name, documentation, field in _COUNTER_FIELDS:
+            yield CounterMetricFamily(name, documentation, value=float(state.get(field, 0)))
+
 
 class MetricsServer:
     """Prometheus metrics exporter"""
@@ -31,7 +87,7 @@ class MetricsServer:
         
         Args:
             config_manager: Configuration manager instance
-            shared_state: Shared state dictionary from multiprocessing.Manager()
+            shared_state: Process-shared state (modules.shared_state.SharedState)
         """
         self.config = config_manager
         self.shared_state = shared_state
@@ -41,9 +97,6 @@ class MetricsServer:
         self.port = self.monitoring_config.get('prometheus_port', 9100)
         self.host = '0.0.0.0'
         
-        # Update interval
-        self.update_interval = 5.0  # seconds
-        
         # Process reference
         self.process: Process = None
         
@@ -57,75 +110,10 @@ class MetricsServer:
         This must be called within the metrics process to avoid
         multiprocessing issues with prometheus_client.
         """
-        # System metrics
-        self.metrics['cpu_usage'] = Gauge(
-            'ids2_cpu_usage_percent',
-            'Current CPU usage percentage'
-        )
-        
-        self.metrics['ram_usage'] = Gauge(
-            'ids2_ram_usage_percent',
-            'Current RAM usage percentage'
-        )
-        
-        self.metrics['throttle_level'] = Gauge(
-            'ids2_throttle_level',
-            'Current throttling level (0-3)'
-        )
-        
-        # Connectivity metrics
-        self.metrics['dns_status'] = Gauge(
-            'ids2_dns_status',
-            'DNS connectivity status (1=ok, 0=fail)'
-        )
-        
-        self.metrics['tls_status'] = Gauge(
-            'ids2_tls_status',
-            'TLS connectivity status (1=ok, 0=fail)'
-        )
-        
-        self.metrics['opensearch_status'] = Gauge(
-            'ids2_opensearch_status',
-            'OpenSearch connectivity status (1=ok, 0=fail)'
-        )
-        
-        self.metrics['aws_ready'] = Gauge(
-            'ids2_aws_ready',
-            'AWS overall readiness (1=ready, 0=not ready)'
-        )
-        
-        # Pipeline metrics
-        self.metrics['vector_status'] = Gauge(
-            'ids2_vector_status',
-            'Vector service status (1=running, 0=stopped)'
-        )
-        
-        self.metrics['suricata_status'] = Gauge(
-            'ids2_suricata_status',
-            'Suricata service status (1=running, 0=stopped)'
-        )
-        
-        self.metrics['redis_status'] = Gauge(
-            'ids2_redis_status',
-            'Redis service status (1=running, 0=stopped)'
-        )
-        
-        self.metrics['pipeline_ok'] = Gauge(
-            'ids2_pipeline_ok',
-            'Overall pipeline health (1=ok, 0=degraded)'
-        )
+        # Shared state gauges and counters, read on each scrape
+        REGISTRY.register(SharedStateCollector(self.shared_state))
         
         # Counters
-        self.metrics['events_processed'] = Counter(
-            'ids2_events_processed_total',
-            'Total number of events processed'
-        )
-        
-        self.metrics['events_failed'] = Counter(
-            'ids2_events_failed_total',
-            'Total number of events that failed processing'
-        )
-        
         self.metrics['gc_forced'] = Counter(
             'ids2_gc_forced_total',
             'Total number of forced garbage collections'
@@ -151,62 +139,6 @@ class MetricsServer:
         
         logger.info("Prometheus metrics initialized")
     
-    def _update_metrics(self) -> None:
-        """
-        Update metrics from shared state
-        
-        Reads values from shared_state and updates Prometheus metrics.
-        """
-        try:
-            # System metrics
-            self.metrics['cpu_usage'].set(
-                self.shared_state.get('cpu_percent', 0.0)
-            )
-            self.metrics['ram_usage'].set(
-                self.shared_state.get('ram_percent', 0.0)
-            )
-            self.metrics['throttle_level'].set(
-                self.shared_state.get('throttle_level', 0)
-            )
-            
-            # Connectivity metrics
-            self.metrics['dns_status'].set(
-                1 if self.shared_state.get('dns_ok', False) else 0
-            )
-            self.metrics['tls_status'].set(
-                1 if self.shared_state.get('tls_ok', False) else 0
-            )
-            self.metrics['opensearch_status'].set(
-                1 if self.shared_state.get('opensearch_ok', False) else 0
-            )
-            self.metrics['aws_ready'].set(
-                1 if self.shared_state.get('aws_ready', False) else 0
-            )
-            
-            # Pipeline metrics
-            self.metrics['vector_status'].set(
-                1 if self.shared_state.get('vector_running', False) else 0
-            )
-            self.metrics['suricata_status'].set(
-                1 if self.shared_state.get('suricata_running', False) else 0
-            )
-            self.metrics['redis_status'].set(
-                1 if self.shared_state.get('redis_running', False) else 0
-            )
-            self.metrics['pipeline_ok'].set(
-                1 if self.shared_state.get('pipeline_ok', False) else 0
-            )
-            
-            # Update counters if values changed
-            events_processed = self.shared_state.get('events_processed', 0)
-            events_failed = self.shared_state.get('events_failed', 0)
-            
-            # Note: Counters can only increment, so we track the delta
-            # This is a simplified approach; in production, use proper counter tracking
-            
-        except Exception as e:
-            logger.error(f"Error updating metrics: {e}")
-    
     def _metrics_loop(self) -> None:
         """
         Main metrics loop (runs in separate process)
@@ -214,6 +146,9 @@ class MetricsServer:
         This is the entry point for Process #4.
         """
         logger.info(f"Metrics server process started")
+        set_parent_death_signal()
+        pin_to_cpus()
+        demote_priority()
         
         try:
             # Setup metrics (must be done in this process)
@@ -223,11 +158,10 @@ class MetricsServer:
             start_http_server(self.port, addr=self.host)
             logger.info(f"Prometheus metrics server listening on {self.host}:{self.port}")
             
-            # Update loop
-            while True:
-                self._update_metrics()
-                time.sleep(self.update_interval)
-                
+            # Metrics are collected by the HTTP server thread on each
+            # scrape; nothing left to do here
+            threading.Event().wait()
+            
         except KeyboardInterrupt:
             logger.info("Metrics server received shutdown signal")
         except Exception as e:
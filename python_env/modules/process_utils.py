@@ -0,0 +1,110 @@
+"""
+Process utility helpers for child process scheduling.
+
+These are called from inside child process entrypoints and degrade
+silently on platforms that do not support the underlying syscalls.
+"""
+
+import os
+import sys
+import ctypes
+import ctypes.util
+import signal
+import logging
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# From <linux/prctl.h>
+_PR_SET_PDEATHSIG = 1
+
+
+def demote_priority(nice_increment: int = 10) -> None:
+    """
+    Lower the scheduling priority of the calling process.
+
+    Used by auxiliary processes (metrics, API) so they cannot add latency
+    to the Suricata/Vector data path under CPU contention.
+
+    Args:
+        nice_increment: Value added to the current niceness
+    """
+    try:
+        os.nice(nice_increment)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not change niceness: {e}")
+
+    if hasattr(os, 'sched_setscheduler') and hasattr(os, 'SCHED_BATCH'):
+        try:
+            os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+        except OSError as e:
+            logger.debug(f"Could not switch to SCHED_BATCH: {e}")
+
+
+def raise_priority(rt_priority: int = 2, nice_fallback: int = -5) -> None:
+    """
+    Raise the scheduling priority of the calling process.
+    
+    Used by the resource controller so throttling decisions are not
+    delayed behind the Suricata/Vector data path. Tries a low SCHED_FIFO
+    priority first and falls back to a negative niceness; both need
+    CAP_SYS_NICE and are skipped silently without it.
+    
+    Args:
+        rt_priority: SCHED_FIFO priority (1-99, keep low)
+        nice_fallback: Niceness increment used when SCHED_FIFO is refused
+    """
+    if hasattr(os, 'sched_setscheduler') and hasattr(os, 'SCHED_FIFO'):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rt_priority))
+            return
+        except OSError as e:
+            logger.debug(f"Could not switch to SCHED_FIFO: {e}")
+    
+    try:
+        os.nice(nice_fallback)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not change niceness: {e}")
+
+
+def pin_to_cpus(cpus: Iterable[int] = frozenset({0})) -> None:
+    """
+    Restrict the calling process to a set of CPUs.
+
+    Used by the monitoring processes so they share the housekeeping core
+    and leave the remaining cores to Suricata/Vector. CPUs the process is
+    not allowed on are ignored; nothing changes if none remain.
+
+    Args:
+        cpus: CPU numbers to run on
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return
+
+    try:
+        allowed = set(cpus) & os.sched_getaffinity(0)
+        if allowed:
+            os.sched_setaffinity(0, allowed)
+    except OSError as e:
+        logger.debug(f"Could not set CPU affinity: {e}")
+
+
+def set_parent_death_signal(sig: int = signal.SIGTERM) -> None:
+    """
+    Ask the kernel to signal the calling process when its parent dies.
+
+    Ensures child processes exit on their own if the supervisor is killed
+    without getting a chance to stop them (Linux only).
+
+    Args:
+        sig: Signal delivered to this process on parent death
+    """
+    if not sys.platform.startswith('linux'):
+        return
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.prctl(_PR_SET_PDEATHSIG, int(sig), 0, 0, 0) != 0:
+            logger.debug(f"prctl(PR_SET_PDEATHSIG) failed: errno {ctypes.get_errno()}")
+    except (OSError, AttributeError) as e:
+        logger.debug(f"Could not set parent death signal: {e}")
@@ -9,11 +9,14 @@ This runs as a separate process and updates shared state.
 
 import os
 import gc
+import random
 import time
 import psutil
 import logging
-from typing import Dict, Any
-from multiprocessing import Process, Manager
+from typing import Dict, Any, Optional, Tuple
+from multiprocessing import Process, Condition
+
+from modules.process_utils import pin_to_cpus, raise_priority, set_parent_death_signal
 
 logger = logging.getLogger(__name__)
 
@@ -27,30 +30,74 @@ class ResourceController:
     THROTTLE_MEDIUM = 2    # 60-70% usage
     THROTTLE_HEAVY = 3     # > 70% usage
     
+    # Seconds between samples per throttle level: sample rarely while idle,
+    # more often under pressure
+    CHECK_INTERVALS = {
+        THROTTLE_NONE: 5.0,
+        THROTTLE_LIGHT: 2.0,
+        THROTTLE_MEDIUM: 1.0,
+        THROTTLE_HEAVY: 1.0,
+    }
+    
     def __init__(self, config_manager, shared_state: Dict[str, Any]):
         """
         Initialize resource controller
         
         Args:
             config_manager: Configuration manager instance
-            shared_state: Shared state dictionary from multiprocessing.Manager()
+            shared_state: Process-shared state (modules.shared_state.SharedState)
         """
         self.config = config_manager
         self.shared_state = shared_state
+        
+        # Broadcast to every waiter when the throttle level changes (created
+        # before the fork so all child processes share it)
+        self._throttle_changed = Condition()
         self.limits = config_manager.get_resource_limits()
         
-        # Monitoring interval
-        self.check_interval = 2.0  # seconds
+        # Monitoring interval, adapted to the throttle level after each sample
+        self.check_interval = self.CHECK_INTERVALS[self.THROTTLE_NONE]
         
         # Process reference
         self.process: Process = None
         
+        # Last (idle, total) CPU jiffies from /proc/stat
+        self._cpu_times: Optional[Tuple[int, int]] = None
+        
+        # Monotonic time of the last forced GC, for interval checks
+        # (last_gc_time in shared state stays a wall-clock timestamp)
+        self._last_gc_monotonic = time.monotonic()
+        
+        # Total automatic collections seen at the previous sample
+        self._gc_collections = sum(stat['collections'] for stat in gc.get_stats())
+        
         # Initialize shared state
-        self.shared_state['cpu_percent'] = 0.0
-        self.shared_state['ram_percent'] = 0.0
-        self.shared_state['throttle_level'] = self.THROTTLE_NONE
-        self.shared_state['resource_ok'] = True
-        self.shared_state['last_gc_time'] = time.time()
+        self.shared_state.update({
+            'cpu_percent': 0.0,
+            'ram_percent': 0.0,
+            'throttle_level': self.THROTTLE_NONE,
+            'resource_ok': True,
+            'last_gc_time': time.time(),
+        })
+    
+    @staticmethod
+    def _read_cpu_times() -> Optional[Tuple[int, int]]:
+        """
+        Read aggregate CPU jiffies from /proc/stat
+        
+        Returns:
+            Tuple of (idle, total) jiffies, or None if /proc is unavailable
+        """
+        try:
+            with open('/proc/stat', 'rb') as f:
+                fields = f.readline().split()
+        except OSError:
+            return None
+        
+        # cpu user nice system idle iowait irq softirq steal [guest ...];
+        # guest time is already counted in user/nice
+        times = [int(v) for v in fields[1:9]]
+        return times[3] + times[4], sum(times)
     
     def _get_cpu_usage(self) -> float:
         """
@@ -59,8 +106,20 @@ class ResourceController:
         Returns:
             CPU usage as percentage (0-100)
         """
-        # Get CPU usage over 1 second interval
-        return psutil.cpu_percent(interval=1.0)
+        # Non-blocking: usage since the previous call, so the loop's own
+        # sleep is the measurement window
+        times = self._read_cpu_times()
+        if times is None:
+            return psutil.cpu_percent(interval=None)
+        
+        previous, self._cpu_times = self._cpu_times, times
+        if previous is None:
+            return 0.0
+        
+        total = times[1] - previous[1]
+        if total <= 0:
+            return 0.0
+        return round(100.0 * (total - (times[0] - previous[0])) / total, 1)
     
     def _get_ram_usage(self) -> float:
         """
@@ -69,8 +128,14 @@ class ResourceController:
         Returns:
             RAM usage as percentage (0-100)
         """
-        mem = psutil.virtual_memory()
-        return mem.percent
+        try:
+            with open('/proc/meminfo', 'rb') as f:
+                data = f.read()
+            total = int(data.split(b'MemTotal:', 1)[1].split(None, 1)[0])
+            available = int(data.split(b'MemAvailable:', 1)[1].split(None, 1)[0])
+            return round(100.0 * (total - available) / total, 1)
+        except (OSError, IndexError, ValueError):
+            return psutil.virtual_memory().percent
     
     def _calculate_throttle_level(self, cpu: float, ram: float) -> int:
         """
@@ -94,21 +159,35 @@ class ResourceController:
         else:
             return self.THROTTLE_NONE
     
-    def _should_force_gc(self, ram: float) -> bool:
+    def _gc_generation(self, ram: float) -> Optional[int]:
         """
-        Determine if garbage collection should be forced
+        Determine which garbage collection generation to force, if any
         
         Args:
             ram: Current RAM usage percentage
             
         Returns:
-            True if GC should be forced
+            Oldest generation to collect (1 or 2), or None to skip GC
         """
-        # Force GC if RAM > 65% and hasn't been done in last 30 seconds
-        last_gc = self.shared_state.get('last_gc_time', 0)
-        time_since_gc = time.time() - last_gc
+        # Automatic collections since the previous sample: none means the
+        # Python heap is quiet and high RAM comes from elsewhere (page
+        # cache, Suricata, Vector), so forcing a collection would only
+        # burn CPU
+        collections = sum(stat['collections'] for stat in gc.get_stats())
+        churn = collections - self._gc_collections
+        self._gc_collections = collections
+        
+        # Force GC if RAM > 65% and hasn't been done in last 30 seconds;
+        # only sweep the old generation (full collection) above 75%
+        time_since_gc = time.monotonic() - self._last_gc_monotonic
         
-        return ram > 65.0 and time_since_gc > 30.0
+        if time_since_gc <= 30.0 or churn <= 0:
+            return None
+        if ram > 75.0:
+            return 2
+        if ram > 65.0:
+            return 1
+        return None
     
     def _monitor_loop(self) -> None:
         """
@@ -118,9 +197,20 @@ class ResourceController:
         This is the entry point for Process #2.
         """
         logger.info("Resource controller process started")
+        set_parent_death_signal()
+        pin_to_cpus()
+        raise_priority()
+        
+        # Prime the CPU counters; the first reading then covers the
+        # first sleep
+        self._get_cpu_usage()
         
         try:
             while True:
+                # Sleep before next check (+/-10% jitter so the wakeups do
+                # not stay in phase with other periodic work)
+                time.sleep(self.check_interval * random.uniform(0.9, 1.1))
+                
                 # Get current usage
                 cpu = self._get_cpu_usage()
                 ram = self._get_ram_usage()
@@ -134,11 +224,31 @@ class ResourceController:
                     ram <= self.limits['max_ram_percent']
                 )
                 
-                # Update shared state
-                self.shared_state['cpu_percent'] = cpu
-                self.shared_state['ram_percent'] = ram
-                self.shared_state['throttle_level'] = throttle
-                self.shared_state['resource_ok'] = resource_ok
+                state = {
+                    'cpu_percent': cpu,
+                    'ram_percent': ram,
+                    'throttle_level': throttle,
+                    'resource_ok': resource_ok,
+                }
+                
+                # Force garbage collection if needed
+                generation = self._gc_generation(ram)
+                if generation is not None:
+                    logger.info(f"Forcing generation {generation} garbage collection due to high RAM usage")
+                    gc.collect(generation)
+                    self._last_gc_monotonic = time.monotonic()
+                    state['last_gc_time'] = time.time()
+                
+                # Update shared state (one locked write per sample)
+                previous_throttle = self.shared_state.get('throttle_level')
+                self.shared_state.update(state)
+                
+                # Wake waiters on transitions only
+                if previous_throttle != throttle:
+                    with self._throttle_changed:
+                        self._throttle_changed.notify_all()
+                
+                self.check_interval = self.CHECK_INTERVALS[throttle]
                 
                 # Log status
                 if throttle > self.THROTTLE_NONE:
@@ -150,12 +260,6 @@ class ResourceController:
                 else:
                     logger.debug(f"Resources OK - CPU: {cpu:.1f}%, RAM: {ram:.1f}%")
                 
-                # Force garbage collection if needed
-                if self._should_force_gc(ram):
-                    logger.info("Forcing garbage collection due to high RAM usage")
-                    gc.collect()
-                    self.shared_state['last_gc_time'] = time.time()
-                
                 # Alert if limits exceeded
                 if not resource_ok:
                     logger.error(
@@ -164,9 +268,6 @@ class ResourceController:
                         f"RAM: {ram:.1f}% (limit: {self.limits['max_ram_percent']}%)"
                     )
                 
-                # Sleep before next check
-                time.sleep(self.check_interval)
-                
         except KeyboardInterrupt:
             logger.info("Resource controller received shutdown signal")
         except Exception as e:
@@ -212,6 +313,24 @@ class ResourceController:
         """Check if resource controller process is alive"""
         return self.process and self.process.is_alive()
     
+    def wait_for_throttle_change(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Block until the throttle level changes
+        
+        Can be called from any process forked after this controller was
+        created.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            New throttle level, or None on timeout
+        """
+        with self._throttle_changed:
+            if not self._throttle_changed.wait(timeout):
+                return None
+        return self.shared_state.get('throttle_level')
+    
     @staticmethod
     def get_throttle_params(throttle_level: int) -> Dict[str, Any]:
         """
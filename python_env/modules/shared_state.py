@@ -0,0 +1,191 @@
+"""
+Shared State Module
+
+Process-shared pipeline state backed by a multiprocessing.shared_memory
+segment. Replaces the multiprocessing.Manager() dict: every field is a
+fixed-size scalar, so reads and writes are plain memory accesses instead
+of pickled RPCs to a manager server process.
+"""
+
+import ctypes
+import logging
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Maximum encoded length of string fields (e.g. the OpenSearch endpoint URL)
+_STR_FIELD_SIZE = 256
+
+
+class SharedStateStruct(ctypes.Structure):
+    """Fixed memory layout of the shared state segment"""
+
+    _fields_ = [
+        # Bumped on every write so readers can detect changes cheaply
+        ('version', ctypes.c_uint64),
+
+        # Resource metrics
+        ('cpu_percent', ctypes.c_double),
+        ('ram_percent', ctypes.c_double),
+        ('throttle_level', ctypes.c_int),
+        ('resource_ok', ctypes.c_bool),
+        ('last_gc_time', ctypes.c_double),
+
+        # Connectivity status
+        ('dns_ok', ctypes.c_bool),
+        ('tls_ok', ctypes.c_bool),
+        ('opensearch_ok', ctypes.c_bool),
+        ('aws_ready', ctypes.c_bool),
+        ('opensearch_endpoint', ctypes.c_char * _STR_FIELD_SIZE),
+        ('last_connectivity_check', ctypes.c_double),
+
+        # Service status
+        ('vector_running', ctypes.c_bool),
+        ('suricata_running', ctypes.c_bool),
+        ('redis_running', ctypes.c_bool),
+        ('api_server_running', ctypes.c_bool),
+        ('pipeline_ok', ctypes.c_bool),
+
+        # Counters
+        ('events_processed', ctypes.c_uint64),
+        ('events_failed', ctypes.c_uint64),
+    ]
+
+
+_FIELDS: Tuple[str, ...] = tuple(
+    name for name, _ in SharedStateStruct._fields_ if name != 'version'
+)
+_STR_FIELDS = frozenset(
+    name for name, ctype in SharedStateStruct._fields_
+    if issubclass(ctype, ctypes.Array)
+)
+
+
+class SharedState:
+    """
+    Dict-like view over the shared memory segment
+
+    The supervisor creates the segment; child processes inherit the
+    mapping on fork, or re-attach to it by name when unpickled under the
+    spawn start method.
+    """
+
+    def __init__(self, name: Optional[str] = None, lock=None):
+        """
+        Create or attach to a shared state segment
+
+        Args:
+            name: Name of an existing segment to attach to (None to create)
+            lock: Lock serializing writers (created if not provided)
+        """
+        self._owner = name is None
+        self._shm = SharedMemory(
+            name=name,
+            create=self._owner,
+            size=ctypes.sizeof(SharedStateStruct)
+        )
+        self._struct = SharedStateStruct.from_buffer(self._shm.buf)
+        self._lock = lock if lock is not None else Lock()
+
+    @property
+    def name(self) -> str:
+        """Name of the underlying shared memory segment"""
+        return self._shm.name
+
+    @property
+    def version(self) -> int:
+        """Write counter, incremented on every update"""
+        return self._struct.version
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'name': self._shm.name, 'lock': self._lock}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(name=state['name'], lock=state['lock'])
+
+    def _set(self, key: str, value: Any) -> None:
+        if key not in _FIELDS:
+            raise KeyError(key)
+        if key in _STR_FIELDS:
+            value = (value or '').encode('utf-8')
+        setattr(self._struct, key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELDS:
+            raise KeyError(key)
+        value = getattr(self._struct, key)
+        if key in _STR_FIELDS:
+            return value.decode('utf-8') or None
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._set(key, value)
+            self._struct.version += 1
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FIELDS)
+
+    def __len__(self) -> int:
+        return len(_FIELDS)
+
+    def keys(self) -> Tuple[str, ...]:
+        return _FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a field value, or default for unknown fields"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy all fields into a plain dict
+        
+        The segment is copied in one memcpy under the writer lock, so the
+        result is consistent with a single update() and never half-written.
+        
+        Returns:
+            Dictionary of field values
+        """
+        with self._lock:
+            copy = SharedStateStruct.from_buffer_copy(self._shm.buf)
+        
+        snap = {}
+        for key in _FIELDS:
+            value = getattr(copy, key)
+            if key in _STR_FIELDS:
+                value = value.decode('utf-8') or None
+            snap[key] = value
+        return snap
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Write several fields under a single lock acquisition"""
+        with self._lock:
+            for key, value in values.items():
+                self._set(key, value)
+            self._struct.version += 1
+
+    def close(self) -> None:
+        """Detach from the shared memory segment"""
+        if self._struct is None:
+            return
+        self._struct = None
+        self._shm.close()
+
+    def __del__(self) -> None:
+        # The struct holds an exported pointer into the segment buffer, so
+        # it must be dropped before SharedMemory tries to close the mapping.
+        if getattr(self, '_struct', None) is not None:
+            self.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared memory segment (creator only)"""
+        if self._owner:
+            self._shm.unlink()
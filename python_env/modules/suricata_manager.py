@@ -6,13 +6,23 @@ Manages Suricata lifecycle and monitors performance.
 """
 
 import os
+import atexit
+import shlex
 import logging
+import threading
 import subprocess
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+from modules.file_utils import file_matches, file_signature, inputs_key, write_file
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of a command's output on the persistent shell
+_SHELL_SENTINEL = '__IDS2_END__'
+
 
 class SuricataManager:
     """Manages Suricata configuration and operations"""
@@ -28,11 +38,33 @@ class SuricataManager:
         self.suricata_config = config_manager.get_suricata_config()
         self.rpi_config = config_manager.get_section('raspberry_pi')
         
+        # Payload encoding expected downstream: 'raw' (base64) or 'printable'
+        self.payload_format = config_manager.get_vector_config().get('payload_format', 'raw')
+        
         # Configuration file path
         self.config_file = Path(self.suricata_config.get('config_file', 'suricata/suricata.yaml'))
         
+        # Jinja2 template the configuration is rendered from (compiled once)
+        self.template_file = Path(
+            self.suricata_config.get('template_file', 'suricata/suricata.yaml.j2')
+        )
+        self._template: Optional[Template] = None
+        
+        # Inputs key and (size, mtime_ns) of the last generated file, to skip
+        # regeneration when neither changed
+        self._last_key: Optional[bytes] = None
+        self._last_signature: Optional[Tuple[int, int]] = None
+        
         # Network interface
         self.interface = self.rpi_config.get('network_interface', 'eth0')
+        
+        # systemd unit for start/stop
+        self.service_name = self.suricata_config.get('service_name', 'suricata')
+        
+        # Persistent shell for lifecycle commands (started on first use)
+        self._shell: Optional[subprocess.Popen] = None
+        self._shell_lock = threading.Lock()
+        atexit.register(self.close)
     
     def generate_config(self) -> bool:
         """
@@ -44,397 +76,138 @@ class SuricataManager:
         try:
             logger.info("Generating Suricata configuration...")
             
+            # Same inputs and file untouched since we wrote it: nothing to do
+            key = inputs_key(self._template_vars())
+            if key == self._last_key and file_signature(self.config_file) == self._last_signature:
+                logger.info(f"Suricata configuration unchanged: {self.config_file}")
+                return True
+            
             # Ensure directory exists
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             
             # Build configuration
-            config_content = self._build_config_content()
+            data = self._build_config_content().encode('utf-8')
             
-            # Write to file
-            with open(self.config_file, 'w') as f:
-                f.write(config_content)
+            # Write to file, unless it already holds the same content
+            if file_matches(self.config_file, data):
+                logger.info(f"Suricata configuration up to date: {self.config_file}")
+            else:
+                write_file(self.config_file, data)
+                logger.info(f"Suricata configuration written to {self.config_file}")
             
-            logger.info(f"Suricata configuration written to {self.config_file}")
+            self._last_key = key
+            self._last_signature = file_signature(self.config_file)
             return True
             
         except Exception as e:
             logger.error(f"Failed to generate Suricata configuration: {e}")
             return False
     
-    def _build_config_content(self) -> str:
+    def _get_template(self) -> Template:
         """
-        Build Suricata configuration content in YAML format
+        Get the compiled configuration template, loading it on first use
         
         Returns:
-            Configuration content as string
+            Compiled Jinja2 template
         """
-        # Get configuration values
-        home_net = self.suricata_config.get('home_net', '192.168.178.0/24')
-        external_net = self.suricata_config.get('external_net', '!$HOME_NET')
-        eve_log_file = self.suricata_config.get('eve_log_file', '/mnt/ram_logs/eve.json')
-        rule_files = self.suricata_config.get('rule_files', ['/etc/suricata/rules/suricata.rules'])
-        
-        # Build YAML configuration
-        config = f'''# Suricata Configuration for IDS2 SOC Pipeline
-# Optimized for Raspberry Pi 5 (4 cores, 8GB RAM)
-# Generated automatically - DO NOT EDIT MANUALLY
-
-%YAML 1.1
----
-
-# ============================================================================
-# VARIABLES
-# ============================================================================
-
-vars:
-  address-groups:
-    HOME_NET: "{home_net}"
-    EXTERNAL_NET: "{external_net}"
+        if self._template is None:
+            env = Environment(
+                loader=FileSystemLoader(str(self.template_file.parent)),
+                auto_reload=False,
+                trim_blocks=True,
+                keep_trailing_newline=True,
+                undefined=StrictUndefined,
+            )
+            self._template = env.get_template(self.template_file.name)
+        return self._template
     
-    HTTP_SERVERS: "$HOME_NET"
-    SMTP_SERVERS: "$HOME_NET"
-    SQL_SERVERS: "$HOME_NET"
-    DNS_SERVERS: "$HOME_NET"
-    TELNET_SERVERS: "$HOME_NET"
-    AIM_SERVERS: "$EXTERNAL_NET"
-    DC_SERVERS: "$HOME_NET"
-    DNP3_SERVER: "$HOME_NET"
-    DNP3_CLIENT: "$HOME_NET"
-    MODBUS_CLIENT: "$HOME_NET"
-    MODBUS_SERVER: "$HOME_NET"
-    ENIP_CLIENT: "$HOME_NET"
-    ENIP_SERVER: "$HOME_NET"
-
-  port-groups:
-    HTTP_PORTS: "80"
-    SHELLCODE_PORTS: "!80"
-    ORACLE_PORTS: 1521
-    SSH_PORTS: 22
-    DNP3_PORTS: 20000
-    MODBUS_PORTS: 502
-    FILE_DATA_PORTS: "[$HTTP_PORTS,110,143]"
-    FTP_PORTS: 21
-    GENEVE_PORTS: 6081
-    VXLAN_PORTS: 4789
-    TEREDO_PORTS: 3544
-
-# ============================================================================
-# PERFORMANCE TUNING (Raspberry Pi 5 Optimized)
-# ============================================================================
-
-# Threading - use 3 worker threads (leave 1 core for system)
-threading:
-  set-cpu-affinity: no
-  cpu-affinity:
-    - management-cpu-set:
-        cpu: [ 0 ]
-    - receive-cpu-set:
-        cpu: [ 1 ]
-    - worker-cpu-set:
-        cpu: [ 2, 3 ]
-  detect-thread-ratio: 1.0
-
-# Packet capture settings
-af-packet:
-  - interface: {self.interface}
-    threads: 2
-    cluster-id: 99
-    cluster-type: cluster_flow
-    defrag: yes
-    use-mmap: yes
-    mmap-locked: yes
-    tpacket-v3: yes
-    ring-size: 2048
-    block-size: 32768
-    block-timeout: 10
-    use-emergency-flush: yes
-
-# ============================================================================
-# OUTPUTS
-# ============================================================================
-
-outputs:
-  # EVE JSON log (primary output)
-  - eve-log:
-      enabled: yes
-      filetype: regular
-      filename: {eve_log_file}
-      
-      # Performance: use mmap for faster writes
-      # Note: This requires /mnt/ram_logs to be a tmpfs
-      
-      # Rotation disabled (Vector handles log rotation)
-      rotate-interval: 0
-      
-      # Output types
-      types:
-        - alert:
-            payload: yes
-            payload-buffer-size: 4kb
-            payload-printable: yes
-            packet: yes
-            metadata: yes
-            http-body: yes
-            http-body-printable: yes
-            
-        - anomaly:
-            enabled: yes
-            
-        - http:
-            extended: yes
-            
-        - dns:
-            query: yes
-            answer: yes
-            
-        - tls:
-            extended: yes
-            
-        - files:
-            force-magic: no
-            
-        - smtp:
-            extended: yes
-            
-        - ssh:
-            enabled: yes
-            
-        - stats:
-            totals: yes
-            threads: yes
-            deltas: yes
-            
-        - flow:
-            enabled: yes
-
-  # Fast log (optional, for quick alerts)
-  - fast:
-      enabled: no
-      filename: /var/log/suricata/fast.log
-      append: yes
-
-# ============================================================================
-# LOGGING
-# ============================================================================
-
-logging:
-  default-log-level: notice
-  default-log-format: "[%i] %t - (%f:%l) <%d> (%n) -- "
-  
-  outputs:
-    - console:
-        enabled: yes
-    - file:
-        enabled: yes
-        level: info
-        filename: /var/log/suricata/suricata.log
-    - syslog:
-        enabled: no
-
-# ============================================================================
-# DETECTION ENGINE
-# ============================================================================
-
-# Rule files
-default-rule-path: /etc/suricata/rules
-rule-files:
-'''
+    def _nic_irq_cpu(self) -> Optional[int]:
+        """
+        Find the CPU servicing most of the capture interface's interrupts
         
-        # Add rule files
-        for rule_file in rule_files:
-            config += f'  - {rule_file}\n'
+        Returns:
+            CPU number, or None if /proc/interrupts has no line for the
+            interface
+        """
+        try:
+            with open('/proc/interrupts', 'rb') as f:
+                cpus = len(f.readline().split())
+                counts = [0] * cpus
+                name = self.interface.encode('utf-8')
+                for line in f:
+                    fields = line.split()
+                    if name not in fields[cpus + 1:]:
+                        continue
+                    for cpu, count in enumerate(fields[1:cpus + 1]):
+                        counts[cpu] += int(count)
+        except (OSError, ValueError):
+            return None
         
-        config += '''
-# Classification file
-classification-file: /etc/suricata/classification.config
-reference-config-file: /etc/suricata/reference.config
-
-# ============================================================================
-# PERFORMANCE SETTINGS
-# ============================================================================
-
-# Packet acquisition
-max-pending-packets: 1024
-
-# Detection engine
-detect:
-  profile: medium
-  custom-values:
-    toclient-groups: 3
-    toserver-groups: 25
-  
-  # Prefilter settings
-  prefilter:
-    default: mpm
-  
-  # Grouping
-  grouping:
-    tcp-whitelist: 53, 80, 139, 443, 445, 1433, 3306, 3389, 6666, 6667, 8080
-    udp-whitelist: 53, 135, 5060
-
-# Stream engine
-stream:
-  memcap: 128mb
-  checksum-validation: yes
-  inline: no
-  reassembly:
-    memcap: 256mb
-    depth: 1mb
-    toserver-chunk-size: 2560
-    toclient-chunk-size: 2560
-    randomize-chunk-size: yes
-
-# Host table
-host:
-  hash-size: 4096
-  prealloc: 1000
-  memcap: 32mb
-
-# IP Reputation
-reputation-categories-file: /etc/suricata/iprep/categories.txt
-default-reputation-path: /etc/suricata/iprep
-reputation-files:
-
-# Flow settings
-flow:
-  memcap: 128mb
-  hash-size: 65536
-  prealloc: 10000
-  emergency-recovery: 30
-
-# Defrag settings
-defrag:
-  memcap: 32mb
-  hash-size: 65536
-  trackers: 65535
-  max-frags: 65535
-  prealloc: yes
-  timeout: 60
-
-# ============================================================================
-# APPLICATION LAYER PARSERS
-# ============================================================================
-
-app-layer:
-  protocols:
-    tls:
-      enabled: yes
-      detection-ports:
-        dp: 443
-    
-    dcerpc:
-      enabled: yes
-    
-    ftp:
-      enabled: yes
+        if not any(counts):
+            return None
+        return counts.index(max(counts))
     
-    ssh:
-      enabled: yes
-    
-    smtp:
-      enabled: yes
-    
-    http:
-      enabled: yes
-      memcap: 64mb
+    def _template_vars(self) -> Dict[str, Any]:
+        """
+        Collect the values rendered into the configuration template
+        
+        Returns:
+            Template variables
+        """
+        # The first usable CPU (0 on the Pi) is left to management threads
+        # and the agent; the workers get the rest, led by the core the NIC
+        # interrupt lands on. With fewer than two spare cores affinity is
+        # left to the scheduler
+        allowed = os.sched_getaffinity(0)
+        management_cpu = min(allowed)
+        cpus = sorted(allowed - {management_cpu})
+        cpu_affinity = len(cpus) >= 2
+        worker_cpus = cpus
+        irq_cpu = self._nic_irq_cpu()
+        if irq_cpu in cpus:
+            worker_cpus = [irq_cpu] + [cpu for cpu in cpus if cpu != irq_cpu]
+        
+        # Keep detect threads from outnumbering the cores they run on once
+        # the capture threads are counted (0.75 on the Pi: 3 cores, 2 threads)
+        threads = self.suricata_config.get('threads', 2)
+        cores = len(worker_cpus) if cpu_affinity else len(allowed)
+        detect_thread_ratio = round(min(1.0, cores / (2 * threads)), 2)
+        
+        # spm-algo only accepts bm/hs/auto, so it follows mpm-algo just
+        # when that is Hyperscan
+        mpm_algo = self.suricata_config.get('mpm_algo', 'auto')
+        spm_algo = 'hs' if mpm_algo == 'hs' else 'auto'
+        
+        return dict(
+            cpu_affinity=cpu_affinity,
+            management_cpu=management_cpu,
+            payload_printable=self.payload_format == 'printable',
+            worker_cpus=worker_cpus,
+            detect_thread_ratio=detect_thread_ratio,
+            home_net=self.suricata_config.get('home_net', '192.168.178.0/24'),
+            external_net=self.suricata_config.get('external_net', '!$HOME_NET'),
+            eve_log_file=self.suricata_config.get('eve_log_file', '/mnt/ram_logs/eve.json'),
+            rule_files=self.suricata_config.get('rule_files', ['/etc/suricata/rules/suricata.rules']),
+            interface=self.interface,
+            threads=threads,
+            detect_profile=self.suricata_config.get('detect_profile', 'low'),
+            mpm_algo=mpm_algo,
+            spm_algo=spm_algo,
+            profiling_enabled=bool(self.suricata_config.get('profiling_enabled', False)),
+            stream_memcap_mb=self.suricata_config.get('stream_memcap_mb', 128),
+            reassembly_memcap_mb=self.suricata_config.get('reassembly_memcap_mb', 256),
+            flow_memcap_mb=self.suricata_config.get('flow_memcap_mb', 128),
+            defrag_memcap_mb=self.suricata_config.get('defrag_memcap_mb', 32),
+        )
     
-    dns:
-      tcp:
-        enabled: yes
-        detection-ports:
-          dp: 53
-      udp:
-        enabled: yes
-        detection-ports:
-          dp: 53
-
-# ============================================================================
-# PROFILING
-# ============================================================================
-
-profiling:
-  rules:
-    enabled: yes
-    filename: /var/log/suricata/rule_perf.log
-    append: yes
-    sort: avgticks
-    limit: 100
-    json: yes
-  
-  keywords:
-    enabled: yes
-    filename: /var/log/suricata/keyword_perf.log
-    append: yes
-  
-  prefilter:
-    enabled: yes
-    filename: /var/log/suricata/prefilter_perf.log
-    append: yes
-  
-  rulegroups:
-    enabled: yes
-    filename: /var/log/suricata/rule_group_perf.log
-    append: yes
-  
-  packets:
-    enabled: yes
-    filename: /var/log/suricata/packet_stats.log
-    append: yes
-    csv:
-      enabled: no
-
-# ============================================================================
-# PCAP PROCESSING
-# ============================================================================
-
-pcap:
-  - interface: {self.interface}
-
-pcap-file:
-  checksum-checks: auto
-
-# ============================================================================
-# UNIX SOCKET
-# ============================================================================
-
-unix-command:
-  enabled: yes
-  filename: /var/run/suricata/suricata-command.socket
-
-# ============================================================================
-# MAGIC FILE
-# ============================================================================
-
-magic-file: /usr/share/file/misc/magic
-
-# ============================================================================
-# LEGACY SETTINGS
-# ============================================================================
-
-legacy:
-  uricontent: enabled
-
-# ============================================================================
-# ENGINE ANALYSIS
-# ============================================================================
-
-engine-analysis:
-  rules-fast-pattern: yes
-  rules: yes
-
-# ============================================================================
-# STATS
-# ============================================================================
-
-stats:
-  enabled: yes
-  interval: 30
-  decoder-events: yes
-  decoder-events-prefix: "decoder.event"
-  stream-events: no
-'''
+    def _build_config_content(self) -> str:
+        """
+        Build Suricata configuration content in YAML format
         
-        return config
+        Returns:
+            Configuration content as string
+        """
+        return self._get_template().render(self._template_vars())
     
     def validate_config(self) -> bool:
         """
@@ -448,10 +221,17 @@ stats:
             return False
         
         try:
-            # Use suricata -T to test configuration
+            # Use suricata -T to test configuration; only errors are of
+            # interest, so skip the log file output and drop stdout. (-q is
+            # not a quiet flag in Suricata: it selects NFQUEUE mode)
             result = subprocess.run(
-                ['suricata', '-T', '-c', str(self.config_file)],
-                capture_output=True,
+                [
+                    'suricata', '-T', '-c', str(self.config_file),
+                    '--set', 'logging.default-log-level=error',
+                    '--set', 'logging.outputs.1.file.enabled=no',
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
                 timeout=30
             )
@@ -473,6 +253,110 @@ stats:
             logger.error(f"Error validating Suricata config: {e}")
             return False
     
+    def _sh(self, command: str, timeout: int = 30) -> Tuple[int, str]:
+        """
+        Run a command on a persistent bash process
+        
+        The shell is started once and reused, so each lifecycle command
+        costs a pipe round trip instead of a fork+exec of a new shell.
+        
+        Args:
+            command: Simple command (no lists or pipelines; timeout wraps it)
+            timeout: Seconds before the command is killed (coreutils timeout)
+            
+        Returns:
+            Tuple of (exit code, combined stdout/stderr); -1 if the shell failed
+        """
+        with self._shell_lock:
+            try:
+                if self._shell is None or self._shell.poll() is not None:
+                    self._shell = subprocess.Popen(
+                        ['bash', '--noprofile', '--norc'],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True
+                    )
+                
+                self._shell.stdin.write(
+                    f"timeout {int(timeout)} {command} </dev/null 2>&1\n"
+                    f"printf '\\n{_SHELL_SENTINEL}%d\\n' $?\n"
+                )
+                self._shell.stdin.flush()
+                
+                lines = []
+                while True:
+                    line = self._shell.stdout.readline()
+                    if not line:
+                        raise RuntimeError("shell exited")
+                    if line.startswith(_SHELL_SENTINEL):
+                        returncode = int(line[len(_SHELL_SENTINEL):])
+                        break
+                    lines.append(line)
+                
+                # Drop the newline printed ahead of the sentinel
+                return returncode, ''.join(lines)[:-1]
+                
+            except Exception as e:
+                logger.error(f"Shell command failed ({command}): {e}")
+                self._close_shell()
+                return -1, ''
+    
+    def _close_shell(self) -> None:
+        """Stop the persistent shell, if running"""
+        if self._shell is None:
+            return
+        try:
+            self._shell.stdin.close()
+            self._shell.wait(timeout=5)
+        except Exception:
+            self._shell.kill()
+        self._shell = None
+    
+    def close(self) -> None:
+        """Release the persistent shell"""
+        with self._shell_lock:
+            self._close_shell()
+    
+    def _systemctl(self, action: str) -> bool:
+        """
+        Run a systemctl action on the Suricata unit
+        
+        Args:
+            action: systemctl verb (start, stop, ...)
+            
+        Returns:
+            True if successful
+        """
+        returncode, output = self._sh(
+            f"systemctl {action} {shlex.quote(self.service_name)}",
+            timeout=60
+        )
+        if returncode != 0:
+            logger.error(f"systemctl {action} {self.service_name} failed: {output.strip()}")
+            return False
+        
+        logger.info(f"Suricata {action} OK")
+        return True
+    
+    def start(self) -> bool:
+        """
+        Start the Suricata service
+        
+        Returns:
+            True if successful
+        """
+        return self._systemctl('start')
+    
+    def stop(self) -> bool:
+        """
+        Stop the Suricata service
+        
+        Returns:
+            True if successful
+        """
+        return self._systemctl('stop')
+    
     def get_stats(self) -> Optional[Dict[str, Any]]:
         """
         Get Suricata statistics via unix socket
@@ -6,80 +6,37 @@ Handles ECS transformation, Redis fallback, and bulk batching.
 """
 
 import os
+import re
+import shutil
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from modules.file_utils import file_matches, file_signature, inputs_key, write_file
 
 logger = logging.getLogger(__name__)
 
+# Largest share of the RAM log tmpfs the Vector disk buffer may take when
+# buffer_on_ram is set; the rest is headroom for eve.json
+_RAM_BUFFER_MAX_SHARE = 0.25
 
-class VectorManager:
-    """Manages Vector configuration and operations"""
-    
-    def __init__(self, config_manager):
-        """
-        Initialize Vector manager
-        
-        Args:
-            config_manager: Configuration manager instance
-        """
-        self.config = config_manager
-        self.vector_config = config_manager.get_vector_config()
-        self.aws_config = config_manager.get_aws_config()
-        
-        # Configuration file path
-        self.config_file = Path(self.vector_config.get('config_file', 'vector/vector.toml'))
-    
-    def generate_config(self) -> bool:
-        """
-        Generate Vector configuration file
-        
-        Returns:
-            True if successful
-        """
-        try:
-            logger.info("Generating Vector configuration...")
-            
-            # Ensure directory exists
-            self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Build configuration
-            config_content = self._build_config_content()
-            
-            # Write to file
-            with open(self.config_file, 'w') as f:
-                f.write(config_content)
-            
-            logger.info(f"Vector configuration written to {self.config_file}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to generate Vector configuration: {e}")
-            return False
-    
-    def _build_config_content(self) -> str:
-        """
-        Build Vector configuration content in TOML format
-        
-        Returns:
-            Configuration content as string
-        """
-        # Get configuration values
-        log_file = self.vector_config.get('log_file', '/mnt/ram_logs/eve.json')
-        buffer_dir = self.vector_config.get('buffer_dir', '/var/lib/vector/buffer')
-        redis_url = self.vector_config.get('redis_url', 'redis://redis:6379/0')
-        opensearch_endpoint = self.aws_config.get('endpoint', '')
-        index_prefix = self.aws_config.get('index_prefix', 'ids2-logs')
-        bulk_size = self.aws_config.get('bulk_size', 100)
-        bulk_timeout = self.aws_config.get('bulk_timeout', 30)
-        buffer_max_size_bytes = self.vector_config.get('buffer_max_size_bytes', 268435456)  # Default to 256MB
-        
-        # Build TOML configuration
-        config = f'''# Vector Configuration for IDS2 SOC Pipeline
+# Sections validate_config() expects, matched in a single regex pass
+_REQUIRED_SECTIONS = frozenset({'sources.suricata_logs', 'sinks.opensearch'})
+_REQUIRED_SECTIONS_RE = re.compile('|'.join(re.escape(section) for section in sorted(_REQUIRED_SECTIONS)))
+
+
+def _toml_escape(value: str) -> str:
+    """Escape a value for use inside a TOML basic (double-quoted) string."""
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+# TOML configuration template, filled with str.format (literal braces are
+# doubled; '{{{{ index_name }}}}' renders as Vector's '{{ index_name }}')
+_CONFIG_TEMPLATE = '''# Vector Configuration for IDS2 SOC Pipeline
 # Generated automatically - DO NOT EDIT MANUALLY
 
-# Data directory
-data_dir = "/var/lib/vector"
+# Data directory (holds the disk buffer and file checkpoints)
+data_dir = "{data_dir}"
 
 # ============================================================================
 # SOURCES
@@ -97,19 +54,14 @@ max_line_bytes = 102400  # 100KB max line size
 # TRANSFORMS
 # ============================================================================
 
-# Transform: Parse JSON
-[transforms.parse_json]
+# Transform: parse JSON, add ECS fields and index routing in a single
+# remap (one topology hop per event instead of three)
+[transforms.enrich]
 type = "remap"
 inputs = ["suricata_logs"]
 source = """
 . = parse_json!(.message)
-"""
 
-# Transform: Add ECS fields
-[transforms.add_ecs_fields]
-type = "remap"
-inputs = ["parse_json"]
-source = """
 # ECS base fields
 .@timestamp = .timestamp
 .ecs.version = "8.0.0"
@@ -154,15 +106,10 @@ if exists(.alert) {{
 
 # Clean up original fields (optional)
 del(.message)
-"""
 
-# Transform: Add index routing
-[transforms.route_to_index]
-type = "remap"
-inputs = ["add_ecs_fields"]
-source = """
-# Generate index name based on date
-.index_name = "{index_prefix}-" + format_timestamp!(.@timestamp, format: "%Y.%m.%d")
+# Generate index name based on date: eve timestamps are ISO 8601 strings,
+# so the date is their first 10 characters (no per-event strftime)
+.index_name = "{index_prefix}-" + replace(slice!(string!(.@timestamp), 0, 10), "-", ".")
 """
 
 # ============================================================================
@@ -172,23 +119,29 @@ source = """
 # Sink: OpenSearch (primary)
 [sinks.opensearch]
 type = "elasticsearch"
-inputs = ["route_to_index"]
+inputs = ["enrich"]
 endpoint = "{opensearch_endpoint}"
 mode = "bulk"
 bulk.index = "{{{{ index_name }}}}"
 bulk.action = "create"
-compression = "gzip"
+compression = "{compression}"
 
-# Batch settings (optimized for Raspberry Pi)
-batch.max_events = {bulk_size}
-batch.timeout_secs = {bulk_timeout}
+# Batch settings (optimized for Raspberry Pi: few large requests)
+batch.max_events = {batch_max_events}
+batch.max_bytes = {bulk_max_bytes}
+batch.timeout_secs = {batch_timeout_secs}
 
-# Buffer settings (disk-based for reliability)
+# Buffer settings (disk-based for reliability; "disk" is the disk_v2
+# implementation since Vector 0.26)
 buffer.type = "disk"
 buffer.max_size = {buffer_max_size_bytes}
-buffer.when_full = "block"
+# Dropping (counted in vector_buffer_discarded_events_total on :9101)
+# keeps a slow OpenSearch from back-pressuring the eve.json reader and,
+# through it, Suricata; redis_fallback still receives every event
+buffer.when_full = "{buffer_when_full}"
 
 # Request settings
+request.concurrency = "adaptive"
 request.timeout_secs = 60
 request.retry_attempts = 3
 request.retry_initial_backoff_secs = 2
@@ -211,7 +164,7 @@ tls.verify_hostname = false
 
 [sinks.redis_fallback]
 type = "redis"
-inputs = ["route_to_index"]
+inputs = ["enrich"]
 url = "{redis_url}"
 key = "vector:fallback:{{{{ index_name }}}}"
 data_type = "list"
@@ -250,8 +203,146 @@ host_key = "host"
 message_key = "message"
 timestamp_key = "@timestamp"
 '''
+
+
+class VectorManager:
+    """Manages Vector configuration and operations"""
+    
+    def __init__(self, config_manager):
+        """
+        Initialize Vector manager
+        
+        Args:
+            config_manager: Configuration manager instance
+        """
+        self.config = config_manager
+        self.vector_config = config_manager.get_vector_config()
+        self.aws_config = config_manager.get_aws_config()
         
-        return config
+        # Configuration file path
+        self.config_file = Path(self.vector_config.get('config_file', 'vector/vector.toml'))
+        
+        # Data directory: on the RAM log tmpfs when buffer_on_ram is set
+        # (keeps buffer writes off the SD card), else persistent storage.
+        # The tmpfs also holds eve.json, so the buffer only goes there when
+        # it leaves most of the space to Suricata
+        paths = config_manager.get_section('paths')
+        buffer_on_ram = self.vector_config.get('buffer_on_ram', False)
+        if buffer_on_ram:
+            buffer_bytes = self.vector_config.get('buffer_max_size_bytes', 268435456)
+            ram_logs_bytes = paths.get('ram_logs_size_mb', 512) * 1024 * 1024
+            if buffer_bytes > ram_logs_bytes * _RAM_BUFFER_MAX_SHARE:
+                logger.warning(
+                    f"Vector buffer ({buffer_bytes} bytes) exceeds "
+                    f"{_RAM_BUFFER_MAX_SHARE:.0%} of the {ram_logs_bytes} byte RAM log "
+                    f"tmpfs; keeping it on persistent storage"
+                )
+                buffer_on_ram = False
+        
+        if buffer_on_ram:
+            self.data_dir = Path(paths.get('ram_logs_dir', '/mnt/ram_logs')) / 'vector'
+            self.buffer_dir = self.data_dir / 'buffer'
+        else:
+            self.data_dir = Path(paths.get('vector_data_dir', '/var/lib/vector'))
+            self.buffer_dir = Path(self.vector_config.get('buffer_dir', self.data_dir / 'buffer'))
+        
+        # Inputs key and (size, mtime_ns) of the last generated file, to skip
+        # regeneration when neither changed
+        self._last_key: Optional[bytes] = None
+        self._last_signature: Optional[Tuple[int, int]] = None
+        
+        # (inputs key, content) of the last built configuration
+        self._content_cache: Optional[Tuple[bytes, str]] = None
+    
+    def generate_config(self) -> bool:
+        """
+        Generate Vector configuration file
+        
+        Returns:
+            True if successful
+        """
+        try:
+            logger.info("Generating Vector configuration...")
+            
+            # Same inputs and file untouched since we wrote it: nothing to do
+            key = self._inputs_key()
+            if key == self._last_key and file_signature(self.config_file) == self._last_signature:
+                logger.info(f"Vector configuration unchanged: {self.config_file}")
+                return True
+            
+            # Ensure directory exists
+            self.config_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Build configuration
+            data = self._build_config_content().encode('utf-8')
+            
+            # Write to file, unless it already holds the same content
+            if file_matches(self.config_file, data):
+                logger.info(f"Vector configuration up to date: {self.config_file}")
+            else:
+                write_file(self.config_file, data)
+                logger.info(f"Vector configuration written to {self.config_file}")
+            
+            self._last_key = key
+            self._last_signature = file_signature(self.config_file)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to generate Vector configuration: {e}")
+            return False
+    
+    def _inputs_key(self) -> bytes:
+        """Digest of everything the generated configuration depends on"""
+        return inputs_key({
+            'vector': self.vector_config,
+            'aws': self.aws_config,
+            'data_dir': str(self.data_dir),
+        })
+    
+    def _build_config_content(self) -> str:
+        """
+        Build Vector configuration content in TOML format
+        
+        Returns:
+            Configuration content as string
+        """
+        # Same inputs as the last build: reuse its result
+        key = self._inputs_key()
+        if self._content_cache is not None and self._content_cache[0] == key:
+            return self._content_cache[1]
+        
+        # Get configuration values
+        log_file = self.vector_config.get('log_file', '/mnt/ram_logs/eve.json')
+        redis_url = self.vector_config.get('redis_url', 'redis://redis:6379/0')
+        opensearch_endpoint = self.aws_config.get('endpoint', '')
+        index_prefix = self.aws_config.get('index_prefix', 'ids2-logs')
+        batch_max_events = self.vector_config.get('batch_max_events', 1000)
+        batch_timeout_secs = self.vector_config.get('batch_timeout_secs', 5)
+        bulk_max_bytes = self.aws_config.get('bulk_max_bytes', 10485760)
+        buffer_max_size_bytes = self.vector_config.get('buffer_max_size_bytes', 268435456)  # Default to 256MB
+        buffer_when_full = self.vector_config.get('buffer_when_full', 'drop_newest')
+        
+        # gzip only pays off on large batches; small ones cost more CPU
+        # to compress than they save on the wire
+        compression = 'gzip' if batch_max_events >= 500 else 'none'
+        
+        # Fill in the TOML template (string values go inside "...")
+        content = _CONFIG_TEMPLATE.format(
+            data_dir=_toml_escape(str(self.data_dir)),
+            log_file=_toml_escape(log_file),
+            redis_url=_toml_escape(redis_url),
+            opensearch_endpoint=_toml_escape(opensearch_endpoint or ''),
+            index_prefix=_toml_escape(index_prefix),
+            compression=compression,
+            batch_max_events=batch_max_events,
+            bulk_max_bytes=bulk_max_bytes,
+            batch_timeout_secs=batch_timeout_secs,
+            buffer_max_size_bytes=buffer_max_size_bytes,
+            buffer_when_full=_toml_escape(buffer_when_full),
+        )
+        
+        self._content_cache = (key, content)
+        return content
     
     def validate_config(self) -> bool:
         """
@@ -269,12 +360,11 @@ timestamp_key = "@timestamp"
             with open(self.config_file, 'r') as f:
                 content = f.read()
             
-            # Basic validation - check for required sections
-            required_sections = ['sources.suricata_logs', 'sinks.opensearch']
-            for section in required_sections:
-                if section not in content:
-                    logger.error(f"Missing required section: {section}")
-                    return False
+            # Basic validation - check for required sections in one scan
+            missing = _REQUIRED_SECTIONS.difference(_REQUIRED_SECTIONS_RE.findall(content))
+            if missing:
+                logger.error(f"Missing required section(s): {', '.join(sorted(missing))}")
+                return False
             
             logger.info("Vector configuration validation passed")
             return True
@@ -320,26 +410,62 @@ timestamp_key = "@timestamp"
         logger.debug("Vector metrics query would be implemented here")
         return None
     
-    def estimate_buffer_usage(self) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _scan_dir(path: str) -> Tuple[int, int]:
+        """
+        Sum file sizes below a directory
+        
+        Uses os.scandir, whose entries carry the file type from readdir,
+        so only regular files cost a stat() call.
+        
+        Args:
+            path: Directory to scan (recursively, without following symlinks)
+            
+        Returns:
+            Tuple of (total size in bytes, file count)
+        """
+        total_size = 0
+        file_count = 0
+        stack = [path]
+        
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                        file_count += 1
+        
+        return total_size, file_count
+    
+    def estimate_buffer_usage(self, fast: bool = False) -> Optional[Dict[str, Any]]:
         """
         Estimate disk buffer usage
         
+        Args:
+            fast: Report the used space of the filesystem holding the buffer
+                (one statvfs call) instead of walking every segment file.
+                Approximate, and no file_count.
+        
         Returns:
             Buffer usage statistics or None
         """
-        buffer_dir = Path(self.vector_config.get('buffer_dir', '/var/lib/vector/buffer'))
+        buffer_dir = self.buffer_dir
         
         if not buffer_dir.exists():
             return None
         
         try:
-            total_size = 0
-            file_count = 0
+            if fast:
+                usage = shutil.disk_usage(buffer_dir)
+                return {
+                    'total_size_mb': usage.used / (1024 * 1024),
+                    'buffer_dir': str(buffer_dir),
+                    'fast': True
+                }
             
-            for file in buffer_dir.rglob('*'):
-                if file.is_file():
-                    total_size += file.stat().st_size
-                    file_count += 1
+            total_size, file_count = self._scan_dir(str(buffer_dir))
             
             return {
                 'total_size_mb': total_size / (1024 * 1024),